@@ -1,198 +1,226 @@
-import io
 import datetime
+import os
+import re
 import sqlite3
 from pathlib import Path
 
 import streamlit as st
 import pandas as pd
-import numpy as np
-from sklearn.cluster import KMeans
-import plotly.express as px
+
+from arsip import Arsip, direktori_arsip
+from aset import LEBAR_PENUH, PustakaAset
+from db import (
+    AKHIR_SOROT,
+    AWAL_SOROT,
+    TABEL_HALAMAN,
+    Database,
+    PenulisBatch,
+    kueri_fts,
+    muat_distribusi_skor,
+    muat_tren_sentimen,
+    muat_tren_skor,
+)
+from ekspor import FORMAT_EKSPOR, CacheEkspor, direktori_ekspor
+from formulir import (
+    KUNCI_KESELURUHAN,
+    KUNCI_LAYANAN,
+    PILIHAN_JENIS_KELAMIN,
+    PILIHAN_LAYANAN,
+    PILIHAN_USIA,
+    SKALA_JAWABAN,
+    extract_data_from_radio,
+    validasi,
+)
+from kinerja import Pelacak, pasang_log
+from migrasi import jalankan_migrasi
+from statistik import (
+    JUMLAH_RESAMPLE,
+    KUNCI_PERLAKUAN_SETARA,
+    TINGKAT_KEPERCAYAAN,
+    bandingkan_layanan,
+    ringkas_item,
+)
 
 # -------------------- KONFIGURASI HALAMAN --------------------
 st.set_page_config(page_title="Survei Klinik Theresia", layout="wide")
 
 # -------------------- PATH ABSOLUT PROYEK --------------------
 BASE_DIR = Path(__file__).resolve().parent  # Lokasi file script Python
-DB_PATH = BASE_DIR / "survei_klinik.db"  # Nama file database yang ada di folder yang sama
+# Nama file database yang ada di folder yang sama (bisa diganti lewat env, mis. untuk benchmark)
+DB_PATH = Path(os.environ.get("SURVEI_DB_PATH", BASE_DIR / "survei_klinik.db"))
+EKSPOR_DIR = direktori_ekspor(DB_PATH)  # file ekspor siap unduh (dibuang otomatis)
+ARSIP_DIR = direktori_arsip(DB_PATH)  # berkas arsip bulanan (dibuat oleh arsip.py)
+TAMPILAN_KLUSTER = ["Ringkas (ukuran = jumlah)", "Heatmap", "Per responden (WebGL)"]
 
 # -------------------- SETUP SESSION STATE --------------------
 if "halaman" not in st.session_state:
     st.session_state.halaman = "Formulir Survei"  # default
 
 # -------------------- DATABASE SETUP -------------------------
+@st.cache_resource
+def get_pelacak():
+    """Rincian waktu per rerun + statistik query, dipakai bersama semua sesi."""
+    pasang_log()
+    return Pelacak()
+
+@st.cache_resource
+def get_db():
+    """Satu pool koneksi (WAL, 1 penulis + beberapa pembaca) per proses."""
+    return Database(DB_PATH, trace=get_pelacak().catat_query)
+
+@st.cache_resource
+def get_penulis():
+    """Thread penulis latar yang menggabungkan submission ke group commit."""
+    return PenulisBatch(get_db())
+
+@st.cache_resource
+def get_model_kluster():
+    """Model K-Means sentimen, dimuat dari DB sekali per proses."""
+    from kluster import ModelKluster  # scikit-learn hanya di-import untuk dashboard
+
+    return ModelKluster()
+
+@st.cache_resource
+def get_arsip():
+    """Lapisan query gabungan partisi live + arsip bulanan."""
+    return Arsip(ARSIP_DIR, trace=get_pelacak().catat_query)
+
+@st.cache_resource
+def get_cache_ekspor():
+    """Cache file ekspor di disk, dikunci per versi data."""
+    return CacheEkspor(EKSPOR_DIR, arsip=get_arsip())
+
+@st.cache_resource
+def get_aset():
+    """Turunan gambar (resize + WebP) dibangun sekali per proses, disimpan di memori."""
+    return PustakaAset(BASE_DIR).siapkan_semua()
+
+@st.cache_resource
 def setup_database():
-    """Membuat DB dan tabel bila belum ada (pakai path absolut)."""
-    conn = sqlite3.connect(str(DB_PATH))
-    c = conn.cursor()
-
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS responden (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        nama TEXT,
-        jenis_kelamin TEXT,
-        usia TEXT,
-        layanan TEXT,
-        tanggal TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS jawaban (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        responden_id INTEGER,
-        pertanyaan_key TEXT,
-        jawaban_teks TEXT,
-        jawaban_skor INTEGER,
-        FOREIGN KEY (responden_id) REFERENCES responden (id)
-    )
-    """)
-
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS saran_masukan (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        responden_id INTEGER,
-        saran TEXT,
-        FOREIGN KEY (responden_id) REFERENCES responden (id)
-    )
-    """)
-
-    conn.commit()
-    conn.close()
+    """Membuat DB dan menerapkan migrasi skema yang belum jalan (sekali per proses)."""
+    return jalankan_migrasi(get_db())
 
 setup_database()
 
+get_pelacak().mulai_rerun(st.session_state.halaman)
+
 # -------------------- HELPER PERTANYAAN ----------------------
 def skala_emosi(pertanyaan, key):
     return st.radio(
         pertanyaan,
-        [
-            "1 😠 Sangat Tidak Puas",
-            "2 😟 Tidak Puas",
-            "3 😐 Netral",
-            "4 🙂 Puas",
-            "5 😄 Sangat Puas",
-        ],
+        SKALA_JAWABAN,
         key=key,
         horizontal=True,
     )
 
-def extract_data_from_radio(radio_val):
-    """return (teks, skor) dari string radio '1 😠 Sangat Tidak Puas'"""
-    if radio_val is None:
-        return None, 0
-    parts = radio_val.split()
-    skor = int(parts[0])
-    teks = " ".join(parts[1:])
-    return teks, skor
-
 def simpan_ke_db(nama, jenis_kelamin, usia, layanan, semua_jawaban_dict, saran):
-    """Simpan semua data form ke DB."""
+    """Simpan semua data form ke DB (lewat antrian group commit)."""
+    jawaban_rows = [
+        (key, *extract_data_from_radio(radio_val))
+        for key, radio_val in semua_jawaban_dict.items()
+        if radio_val
+    ]
     try:
-        conn = sqlite3.connect(str(DB_PATH))
-        c = conn.cursor()
-
-        # 1) responden
-        c.execute(
-            "INSERT INTO responden (nama, jenis_kelamin, usia, layanan) VALUES (?, ?, ?, ?)",
-            (nama, jenis_kelamin, usia, layanan),
-        )
-        new_responden_id = c.lastrowid
-
-        # 2) semua jawaban
-        for key, radio_val in semua_jawaban_dict.items():
-            if radio_val:
-                teks, skor = extract_data_from_radio(radio_val)
-                c.execute(
-                    "INSERT INTO jawaban (responden_id, pertanyaan_key, jawaban_teks, jawaban_skor) VALUES (?, ?, ?, ?)",
-                    (new_responden_id, key, teks, skor),
-                )
-
-        # 3) saran
-        if saran:
-            c.execute(
-                "INSERT INTO saran_masukan (responden_id, saran) VALUES (?, ?)",
-                (new_responden_id, saran),
-            )
-
-        conn.commit()
+        # memblokir sampai batch berisi submission ini sudah COMMIT
+        with get_pelacak().rentang("simpan_ke_db"):
+            get_penulis().submit(nama, jenis_kelamin, usia, layanan, jawaban_rows, saran)
         return True
-    except sqlite3.Error as e:
+    except (sqlite3.Error, TimeoutError) as e:
         st.error(f"Terjadi error saat menyimpan ke database: {e}")
         return False
-    finally:
-        try:
-            conn.close()
-        except:
-            pass
-
-def generate_excel(dataframes_dict):
-    """Buat file Excel di memori dari dict DataFrame."""
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        for sheet_name, df in dataframes_dict.items():
-            if isinstance(df, pd.DataFrame) and not df.empty:
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
-    return output.getvalue()
-
-def load_data_from_db():
-    """Load semua data dari DB -> DataFrame."""
-    conn = sqlite3.connect(str(DB_PATH))
+
+def filter_dashboard():
+    """Widget filter data responden -> dict untuk Arsip.ambil_halaman."""
+    with st.expander("🔎 Filter Data", expanded=False):
+        c1, c2 = st.columns(2)
+        rentang = c1.date_input("Rentang tanggal", value=(), key="filter_tanggal")
+        layanan = c2.multiselect("Layanan", PILIHAN_LAYANAN, key="filter_layanan")
+        usia = c1.multiselect("Usia", PILIHAN_USIA, key="filter_usia")
+        jenis_kelamin = c2.multiselect("Jenis Kelamin", PILIHAN_JENIS_KELAMIN, key="filter_jk")
+    return {
+        "tanggal": tuple(rentang) if len(rentang) == 2 else None,
+        "layanan": layanan,
+        "usia": usia,
+        "jenis_kelamin": jenis_kelamin,
+    }
+
+def tampilkan_tabel(tabel, filter_data, key):
+    """Tampilkan satu halaman tabel (diambil & diurutkan di SQL) + tombol navigasi."""
+    kolom_urut = TABEL_HALAMAN[tabel][2]
+    c1, c2, c3 = st.columns([2, 1, 1])
+    urut = c1.selectbox("Urutkan berdasarkan", kolom_urut, key=f"{key}_urut")
+    menurun = c2.radio("Arah", ["Turun", "Naik"], horizontal=True, key=f"{key}_arah") == "Turun"
+    ukuran = c3.selectbox("Baris per halaman", [25, 50, 100, 500], index=1, key=f"{key}_ukuran")
+
+    # tumpukan kursor awal tiap halaman; direset bila filter/urutan berubah
+    tanda = repr((filter_data, urut, menurun, ukuran))
+    if st.session_state.get(f"{key}_tanda") != tanda:
+        st.session_state[f"{key}_tanda"] = tanda
+        st.session_state[f"{key}_kursor"] = []
+    tumpukan = st.session_state[f"{key}_kursor"]
+    kursor = tumpukan[-1] if tumpukan else None
+
     try:
-        df_responden = pd.read_sql_query("SELECT * FROM responden ORDER BY id DESC", conn)
-        df_jawaban = pd.read_sql_query(
-            "SELECT * FROM jawaban ORDER BY responden_id DESC, id ASC", conn
-        )
-        df_saran = pd.read_sql_query(
-            "SELECT * FROM saran_masukan ORDER BY responden_id DESC", conn
-        )
-        return df_responden, df_jawaban, df_saran
+        with get_pelacak().rentang(f"tabel_{tabel}"):
+            df, berikutnya = get_arsip().ambil_halaman(
+                get_db(), tabel, filter_data, urut, menurun, kursor, ukuran
+            )
     except Exception as e:
         st.error(f"Gagal memuat data: {e}")
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-    finally:
-        conn.close()
-
-def prepare_cluster_data(df_jawaban):
-    """
-    Ubah jawaban (long) jadi per responden (wide) untuk clustering.
-    - skor_layanan: rata2 pertanyaan yang diawali u... atau b...
-    - skor_keseluruhan: rata2 pertanyaan k...
-    """
-    if df_jawaban.empty:
-        return pd.DataFrame(columns=["responden_id", "skor_layanan", "skor_keseluruhan"])
+        return
+    st.dataframe(df, width="stretch")
+
+    n1, n2, n3 = st.columns([1, 1, 4])
+    n1.button("⬅️ Sebelumnya", key=f"{key}_prev", disabled=not tumpukan, on_click=tumpukan.pop)
+    n2.button(
+        "Berikutnya ➡️",
+        key=f"{key}_next",
+        disabled=berikutnya is None,
+        on_click=tumpukan.append,
+        args=(berikutnya,),
+    )
+    n3.caption(f"Halaman {len(tumpukan) + 1}")
 
-    try:
-        df_layanan = df_jawaban[df_jawaban["pertanyaan_key"].str.contains("^[ub]", regex=True)]
-        if not df_layanan.empty:
-            df_layanan_skor = (
-                df_layanan.groupby("responden_id")["jawaban_skor"]
-                .mean()
-                .reset_index()
-                .rename(columns={"jawaban_skor": "skor_layanan"})
-            )
-        else:
-            df_layanan_skor = pd.DataFrame(columns=["responden_id", "skor_layanan"])
-
-        df_keseluruhan = df_jawaban[df_jawaban["pertanyaan_key"].str.contains("^k", regex=True)]
-        if not df_keseluruhan.empty:
-            df_keseluruhan_skor = (
-                df_keseluruhan.groupby("responden_id")["jawaban_skor"]
-                .mean()
-                .reset_index()
-                .rename(columns={"jawaban_skor": "skor_keseluruhan"})
-            )
-        else:
-            df_keseluruhan_skor = pd.DataFrame(columns=["responden_id", "skor_keseluruhan"])
+def _sorot_markdown(teks):
+    """Cuplikan hasil FTS -> markdown: isi di-escape, kata yang cocok ditebalkan."""
+    teks = re.sub(r"([\\`*_{}\[\]()#+\-.!|>~<:$])", r"\\\1", teks)
+    return teks.replace(AWAL_SOROT, "**").replace(AKHIR_SOROT, "**")
 
-        if df_layanan_skor.empty or df_keseluruhan_skor.empty:
-            return pd.DataFrame(columns=["responden_id", "skor_layanan", "skor_keseluruhan"])
+def tampilkan_pencarian_saran(kueri, filter_data, key, ukuran=20):
+    """Hasil pencarian full-text saran (urut relevansi), per halaman."""
+    tanda = repr((kueri, filter_data))
+    if st.session_state.get(f"{key}_tanda") != tanda:
+        st.session_state[f"{key}_tanda"] = tanda
+        st.session_state[f"{key}_halaman"] = 0
+    halaman = st.session_state[f"{key}_halaman"]
 
-        df_cluster_data = pd.merge(df_layanan_skor, df_keseluruhan_skor, on="responden_id", how="inner")
-        return df_cluster_data.dropna()
+    try:
+        with get_pelacak().rentang("cari_saran"):
+            df, total = get_arsip().cari_saran(get_db(), kueri, filter_data, halaman, ukuran)
     except Exception as e:
-        st.error(f"Error saat menyiapkan data cluster: {e}")
-        return pd.DataFrame(columns=["responden_id", "skor_layanan", "skor_keseluruhan"])
+        st.error(f"Pencarian gagal: {e}")
+        return
+    if total == 0:
+        st.info("Tidak ada saran yang cocok.")
+        return
+    st.caption(f"{total} saran cocok")
+    for row in df.itertuples():
+        st.markdown(
+            f"**{str(row.tanggal)[:10]}** · {row.layanan} · {_sorot_markdown(str(row.nama))} "
+            f"(responden #{row.responden_id})  \n{_sorot_markdown(row.cuplikan)}"
+        )
+
+    jumlah_halaman = (total + ukuran - 1) // ukuran
+    n1, n2, n3 = st.columns([1, 1, 4])
+    n1.button(
+        "⬅️ Sebelumnya", key=f"{key}_prev", disabled=halaman == 0,
+        on_click=lambda: st.session_state.update({f"{key}_halaman": halaman - 1}),
+    )
+    n2.button(
+        "Berikutnya ➡️", key=f"{key}_next", disabled=halaman + 1 >= jumlah_halaman,
+        on_click=lambda: st.session_state.update({f"{key}_halaman": halaman + 1}),
+    )
+    n3.caption(f"Halaman {halaman + 1} dari {jumlah_halaman}")
 
 # -------------------- NAVIGATION (SIDEBAR) -------------------
 menu_pages = ["Formulir Survei", "Beranda", "Tentang Klinik", "Admin Dashboard"]
@@ -200,20 +228,21 @@ menu_pages = ["Formulir Survei", "Beranda", "Tentang Klinik", "Admin Dashboard"]
 with st.sidebar:
     c1, c2, c3 = st.columns([0.5, 5, 0.5])
     with c2:
-        st.image("logo.jpeg", width=250)  # logo sidebar
+        st.image(get_aset().gambar("logo.jpeg", 250), width=250)  # logo sidebar
     st.markdown("<br>", unsafe_allow_html=True)
 
 for page in menu_pages:
-    if st.sidebar.button(page, key=f"nav_{page}", use_container_width=True):
+    if st.sidebar.button(page, key=f"nav_{page}", width="stretch"):
         st.session_state.halaman = page
 
 # -------------------- HEADER GLOBAL --------------------------
 # logo header tiap halaman
-st.image("logo.jpeg", width=100)
+st.image(get_aset().gambar("logo.jpeg", 100), width=100)
 st.markdown("---")
 
 # -------------------- HALAMAN: FORMULIR ----------------------
 halaman = st.session_state.halaman
+get_pelacak().tandai_halaman(halaman)
 
 if halaman == "Formulir Survei":
     st.title("📝Formulir Survei Kepuasan Pasien")
@@ -221,17 +250,14 @@ if halaman == "Formulir Survei":
     with st.form("form_survei"):
         st.subheader("A. Data Diri Responden")
         nama = st.text_input("Nama Lengkap")
-        usia = st.radio(
-            "Usia",
-            ["Dibawah 20 tahun", "21–30 tahun", "31–40 tahun", "41–50 tahun", "Diatas 50 tahun"],
-        )
-        jenis_kelamin = st.selectbox("Jenis Kelamin", ["Laki-laki", "Perempuan"])
+        usia = st.radio("Usia", PILIHAN_USIA)
+        jenis_kelamin = st.selectbox("Jenis Kelamin", PILIHAN_JENIS_KELAMIN)
 
         st.markdown("---")
 
         layanan = st.selectbox(
             "Silakan pilih jenis layanan yang Anda gunakan:",
-            ["Umum", "BPJS"],
+            PILIHAN_LAYANAN,
             key="pilihan_layanan",
         )
 
@@ -282,15 +308,8 @@ if halaman == "Formulir Survei":
         submit = st.form_submit_button("Kirim Survei")
 
     if submit:
-        # cek semua pertanyaan layanan (u... / b...) terisi
-        prefix = layanan[0].lower()  # 'u' atau 'b'
-        semua_terisi = all(
-            (val is not None)
-            for k, val in jawaban_dict.items()
-            if k.startswith(prefix)
-        )
-
-        if not nama or not semua_terisi:
+        # nama & semua pertanyaan layanan (u... / b...) wajib terisi
+        if validasi(nama, jenis_kelamin, usia, layanan, jawaban_dict):
             st.error("Mohon isi Nama Lengkap dan semua pertanyaan di bagian Kepuasan Pelayanan.")
         else:
             if simpan_ke_db(nama, jenis_kelamin, usia, layanan, jawaban_dict, saran):
@@ -316,7 +335,7 @@ if halaman == "Formulir Survei":
 
 # -------------------- HALAMAN: BERANDA -----------------------
 elif halaman == "Beranda":
-    st.image("staf.jpg", use_container_width=True, caption="Dokter, Staff, dan Jajaran")
+    st.image(get_aset().gambar("staf.jpg", LEBAR_PENUH), width="stretch", caption="Dokter, Staff, dan Jajaran")
     st.markdown("---")
 
     # Video profil (opsional)
@@ -341,13 +360,13 @@ elif halaman == "Tentang Klinik":
 
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.image("ftbersama.jpg", width=300)
+        st.image(get_aset().gambar("ftbersama.jpg", 300), width=300)
     with col2:
-        st.image("penerima.jpg", width=310)
+        st.image(get_aset().gambar("penerima.jpg", 310), width=310)
     with col3:
-        st.image("piagam.jpg", width=280)
+        st.image(get_aset().gambar("piagam.jpg", 280), width=280)
     with col4:
-        st.image("plakat.jpg", width=300)
+        st.image(get_aset().gambar("plakat.jpg", 300), width=300)
 
     st.markdown("""  
         <div style="text-align: center; margin-bottom: 80px;">
@@ -357,6 +376,19 @@ elif halaman == "Tentang Klinik":
     """, unsafe_allow_html=True)
     # -------------------- HALAMAN: ADMIN DASHBOARD ----------------
 elif halaman == "Admin Dashboard":
+    # stack analitik yang berat hanya dimuat saat dashboard dibuka
+    import plotly.express as px
+    from kluster import (
+        K_KANDIDAT,
+        SEED_KANDIDAT,
+        gabung_hasil_kluster,
+        gabung_sel_kluster,
+        jalankan_seleksi,
+        muat_hasil_kluster,
+        muat_sel_kluster,
+        muat_seleksi,
+    )
+
     st.title("📊 Admin Dashboard - Hasil Survei")
 
     # Input password for admin access
@@ -366,115 +398,359 @@ elif halaman == "Admin Dashboard":
     if password == ADMIN_PASSWORD:
         st.sidebar.success("Login Berhasil")
 
-        # Load data from the database
-        df_responden, df_jawaban, df_saran = load_data_from_db()
+        total_semua = get_arsip().hitung_baris(get_db(), "responden")
+        if get_arsip().gagal:
+            st.warning(
+                "Sebagian arsip tidak bisa dibaca dan dilewati: "
+                + ", ".join(f"{berkas} ({pesan})" for berkas, pesan in sorted(get_arsip().gagal.items()))
+            )
 
-        if df_responden.empty:
+        if total_semua == 0:
             st.info("Belum ada data survei yang masuk.")
         else:
+            # Tabel 1-4: hanya halaman yang terlihat yang diambil dari DB
+            filter_data = filter_dashboard()
+
             # 1) Data Responden
             st.subheader("1. Data Responden")
-            st.info(f"Total Responden: {len(df_responden)}")
-            st.dataframe(df_responden, use_container_width=True)
+            total = get_arsip().hitung_baris(get_db(), "responden", filter_data)
+            st.info(f"Total Responden: {total}")
+            tampilkan_tabel("responden", filter_data, key="tabel_responden")
 
             # 2) Detail Jawaban
             st.subheader("2. Detail Semua Jawaban")
-            st.dataframe(df_jawaban, use_container_width=True)
+            tampilkan_tabel("jawaban", filter_data, key="tabel_jawaban")
 
             # 3) Saran
             st.subheader("3. Saran dan Masukan")
-            st.dataframe(df_saran, use_container_width=True)
+            kueri = kueri_fts(st.text_input("🔍 Cari saran", key="cari_saran", placeholder="mis. antrian bpjs"))
+            if kueri:
+                tampilkan_pencarian_saran(kueri, filter_data, key="hasil_cari_saran")
+            else:
+                tampilkan_tabel("saran_masukan", filter_data, key="tabel_saran")
 
-            # 4) Data Gabungan
+            # 4) Data Gabungan (view responden_saran)
             st.subheader("4. Data Gabungan (Responden + Saran)")
-            if not df_saran.empty:
-                df_gabung = pd.merge(
-                    df_responden,
-                    df_saran.drop(columns=["id"], errors="ignore"),
-                    left_on="id",
-                    right_on="responden_id",
-                    how="left",
-                )
-            else:
-                df_gabung = df_responden.copy()
-                df_gabung["responden_id"] = np.nan
-                df_gabung["saran"] = np.nan
-            st.dataframe(df_gabung, use_container_width=True)
+            tampilkan_tabel("responden_saran", filter_data, key="tabel_gabung")
 
-            # 5) K-Means Clustering
+            # 5) K-Means Clustering (model tersimpan, diperbarui inkremental)
             st.subheader("5. Analisis Kluster Sentimen (K-Means)")
-            df_cluster_data = prepare_cluster_data(df_jawaban)
+            latih_ulang = st.button("🔄 Latih Ulang Model Kluster", key="latih_ulang_kluster")
+            tampilan_kluster = st.radio(
+                "Tampilan", TAMPILAN_KLUSTER, horizontal=True, key="tampilan_kluster",
+                help="Mode ringkas & heatmap mengirim satu titik per sel skor, bukan per responden.",
+            )
+            per_responden = tampilan_kluster == TAMPILAN_KLUSTER[2]
+            model_kluster = get_model_kluster()
+            try:
+                with get_pelacak().rentang("kmeans"):
+                    model_kluster.perbarui(get_db(), latih_ulang=latih_ulang)
+                    if per_responden:
+                        df_cluster_data = gabung_hasil_kluster(get_arsip().baca(get_db(), muat_hasil_kluster))
+                        jumlah_responden = len(df_cluster_data)
+                    else:
+                        df_cluster_data = gabung_sel_kluster(get_arsip().baca(get_db(), muat_sel_kluster))
+                        jumlah_responden = int(df_cluster_data["jumlah"].sum())
+            except Exception as e:
+                st.error(f"Error saat menyiapkan data cluster: {e}")
+                df_cluster_data = pd.DataFrame()
+                jumlah_responden = 0
 
-            if df_cluster_data.shape[0] < 3:
+            if model_kluster.model is None or jumlah_responden < 3:
                 st.info("Tidak cukup data responden (minimum 3) untuk melakukan clustering.")
-                df_cluster_data = pd.DataFrame()
             else:
                 try:
-                    X = df_cluster_data[["skor_layanan", "skor_keseluruhan"]]
-                    kmeans = KMeans(n_clusters=3, random_state=42, n_init=10).fit(X)
-                    df_cluster_data["cluster"] = kmeans.labels_
-
-                    centers = kmeans.cluster_centers_
-                    center_means = centers.mean(axis=1)
-                    order = np.argsort(center_means)
-                    mapping = {
-                        order[0]: "Negatif/Kurang Puas",
-                        order[1]: "Netral",
-                        order[2]: "Positif/Puas",
+                    centers = model_kluster.centers
+                    mapping = model_kluster.mapping
+                    label_sumbu = {
+                        "skor_layanan": "Rata-rata Skor Layanan (Umum/BPJS)",
+                        "skor_keseluruhan": "Rata-rata Skor Keseluruhan",
+                        "jumlah": "Jumlah Responden",
                     }
-                    df_cluster_data["sentimen"] = df_cluster_data["cluster"].map(mapping).astype("category")
 
                     st.markdown("#### Visualisasi Kluster Sentimen")
-                    fig = px.scatter(
-                        df_cluster_data,
-                        x="skor_layanan",
-                        y="skor_keseluruhan",
-                        color="sentimen",
-                        title="Kluster Sentimen Responden",
-                        labels={"skor_layanan": "Rata-rata Skor Layanan (Umum/BPJS)", "skor_keseluruhan": "Rata-rata Skor Keseluruhan"},
-                        hover_data=["responden_id"],
-                    )
-
-                    # Tambahkan pusat cluster
-                    centers_df = pd.DataFrame(centers, columns=["skor_layanan", "skor_keseluruhan"])
-                    centers_df["sentimen"] = [mapping[i] for i in range(3)]
-                    fig.add_scatter(
-                        x=centers_df["skor_layanan"],
-                        y=centers_df["skor_keseluruhan"],
-                        mode="markers",
-                        marker=dict(color="black", size=15, symbol="cross"),
-                        name="Pusat Kluster",
-                    )
-
-                    st.plotly_chart(fig, use_container_width=True)
+                    with get_pelacak().rentang("plotly"):
+                        if per_responden:
+                            # satu titik per responden -> trace WebGL (scattergl)
+                            fig = px.scatter(
+                                df_cluster_data,
+                                x="skor_layanan",
+                                y="skor_keseluruhan",
+                                color="sentimen",
+                                title="Kluster Sentimen Responden",
+                                labels=label_sumbu,
+                                hover_data=["responden_id"],
+                                render_mode="webgl",
+                            )
+                        elif tampilan_kluster == TAMPILAN_KLUSTER[1]:
+                            fig = px.density_heatmap(
+                                df_cluster_data,
+                                x="skor_layanan",
+                                y="skor_keseluruhan",
+                                z="jumlah",
+                                histfunc="sum",
+                                nbinsx=16,
+                                nbinsy=16,
+                                range_x=[1, 5],
+                                range_y=[1, 5],
+                                title=f"Kepadatan Responden (n = {jumlah_responden:,})",
+                                labels=label_sumbu,
+                            )
+                        else:
+                            # satu titik per sel skor, ukuran = jumlah responden
+                            fig = px.scatter(
+                                df_cluster_data,
+                                x="skor_layanan",
+                                y="skor_keseluruhan",
+                                color="sentimen",
+                                size="jumlah",
+                                size_max=40,
+                                title=f"Kluster Sentimen Responden (n = {jumlah_responden:,})",
+                                labels=label_sumbu,
+                                hover_data=["jumlah"],
+                            )
+
+                        # Tambahkan pusat cluster
+                        centers_df = pd.DataFrame(centers, columns=["skor_layanan", "skor_keseluruhan"])
+                        centers_df["sentimen"] = [mapping[i] for i in range(3)]
+                        fig.add_scatter(
+                            x=centers_df["skor_layanan"],
+                            y=centers_df["skor_keseluruhan"],
+                            mode="markers",
+                            marker=dict(color="black", size=15, symbol="cross"),
+                            name="Pusat Kluster",
+                            text=centers_df["sentimen"],
+                        )
+
+                        st.plotly_chart(fig, width="stretch")
                     st.markdown("#### Detail Data Kluster")
-                    st.dataframe(df_cluster_data, use_container_width=True)
+                    st.dataframe(df_cluster_data, width="stretch")
                 except Exception as e:
                     st.error(f"Terjadi error saat visualisasi K-Means: {e}")
-                    df_cluster_data = pd.DataFrame()
-
-            # 6) Download Excel
-            st.subheader("6. Download Data Excel")
-            st.info("Klik tombol di bawah untuk mengunduh semua data dalam satu file Excel.")
-            excel_data_dict = {
-                "Responden": df_responden,
-                "Detail Jawaban": df_jawaban,
-                "Saran Masukan": df_saran,
-                "Data Gabungan": df_gabung,
-                "Analisis Kluster": df_cluster_data,
+
+            # seleksi k & seed berjalan di process pool; hasil terakhir disimpan di DB
+            with st.expander("🧪 Seleksi Model Otomatis", expanded=False):
+                st.caption(
+                    f"Membandingkan k = {K_KANDIDAT.start}–{K_KANDIDAT.stop - 1} dengan "
+                    f"{len(SEED_KANDIDAT)} seed per k (data live). k terbaik = silhouette rata-rata tertinggi; "
+                    "model sentimen 3 kluster di atas tidak diganti."
+                )
+                try:
+                    if st.button("▶️ Jalankan Seleksi", key="jalankan_seleksi"):
+                        with st.spinner("Melatih kandidat model..."), get_pelacak().rentang("seleksi_kluster"):
+                            seleksi = jalankan_seleksi(get_db())
+                    else:
+                        seleksi = get_db().read(muat_seleksi)
+                except Exception as e:
+                    st.error(f"Gagal menjalankan seleksi model: {e}")
+                    seleksi = None
+
+                if seleksi is None:
+                    st.info("Belum ada hasil seleksi model.")
+                else:
+                    if not seleksi["segar"]:
+                        st.warning(f"Data sudah berubah sejak seleksi terakhir ({seleksi['dibuat']}).")
+                    st.markdown(f"**k terbaik: {seleksi['k']}** (seed {seleksi['seed']})")
+                    per_k = seleksi["metrik"].groupby("k", as_index=False)[["silhouette", "inersia_per_titik"]].mean()
+                    kolom_kiri, kolom_kanan = st.columns(2)
+                    with kolom_kiri:
+                        st.plotly_chart(
+                            px.line(per_k, x="k", y="silhouette", markers=True, title="Silhouette rata-rata per k"),
+                            width="stretch",
+                        )
+                    with kolom_kanan:
+                        st.plotly_chart(
+                            px.line(per_k, x="k", y="inersia_per_titik", markers=True, title="Inersia per responden"),
+                            width="stretch",
+                        )
+                    sel = seleksi["sel"].assign(cluster=lambda d: d["cluster"].astype(str))
+                    st.plotly_chart(
+                        px.scatter(
+                            sel,
+                            x="skor_layanan",
+                            y="skor_keseluruhan",
+                            color="cluster",
+                            size="jumlah",
+                            size_max=40,
+                            title=f"Model terpilih (k = {seleksi['k']})",
+                            hover_data=["jumlah"],
+                        ),
+                        width="stretch",
+                    )
+                    st.dataframe(seleksi["metrik"], width="stretch")
+
+            # 6) Download (streaming langsung dari DB, bukan dari DataFrame di atas)
+            st.subheader("6. Download Data")
+            st.info(
+                "Klik tombol di bawah untuk mengunduh semua data dalam satu file. "
+                "Untuk data besar, CSV atau Parquet jauh lebih cepat daripada Excel."
+            )
+            format_ekspor = st.radio(
+                "Format file", list(FORMAT_EKSPOR), horizontal=True, key="format_ekspor"
+            )
+            ext, mime = FORMAT_EKSPOR[format_ekspor]
+            cache_ekspor = get_cache_ekspor()
+            try:
+                # file hanya dibangun saat diminta; data yang sama dilayani dari cache disk
+                path_ekspor = cache_ekspor.cari(get_db(), format_ekspor)
+                if path_ekspor is None and st.button(f"⚙️ Siapkan File {format_ekspor}", key="siapkan_ekspor"):
+                    bar = st.progress(0.0, text="Menyiapkan file...")
+                    with get_pelacak().rentang("ekspor"):
+                        path_ekspor = cache_ekspor.buat(
+                            get_db(),
+                            format_ekspor,
+                            progress=lambda i, n, nama: bar.progress(i / n, text=f"Menulis {nama}..." if nama else "Selesai"),
+                        )
+                    bar.empty()
+                if path_ekspor is not None:
+                    timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H%M%S")
+                    file_name = f"hasil_survei_klinik_{timestamp}.{ext}"
+                    # callable: file baru dibaca saat tombol diklik, bukan di setiap rerun
+                    st.download_button(
+                        label=f"📥 Download Data ({format_ekspor})",
+                        data=path_ekspor.read_bytes,
+                        file_name=file_name,
+                        mime=mime,
+                    )
+            except Exception as e:
+                st.error(f"Gagal membuat file {format_ekspor}: {e}")
+
+            # 7) Tren (dibaca dari tabel rollup harian, bukan dari jawaban per baris)
+            st.subheader("7. Tren Kepuasan")
+            st.caption("Filter tanggal & layanan diterapkan; filter usia & jenis kelamin tidak berlaku untuk tren.")
+            c1, c2 = st.columns(2)
+            periode = c1.radio("Periode", ["Mingguan", "Bulanan"], horizontal=True, key="tren_periode")
+            pilihan_kunci = {
+                "Pertanyaan layanan (Umum/BPJS)": KUNCI_LAYANAN["Umum"] + KUNCI_LAYANAN["BPJS"],
+                "Keseluruhan pengalaman": KUNCI_KESELURUHAN,
             }
+            grup = c2.selectbox("Pertanyaan", list(pilihan_kunci), key="tren_pertanyaan")
             try:
-                excel_bytes = generate_excel(excel_data_dict)
-                timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H%M%S")
-                file_name = f"hasil_survei_klinik_{timestamp}.xlsx"
-                st.download_button(
-                    label="📥 Download Data (Excel)",
-                    data=excel_bytes,
-                    file_name=file_name,
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                with get_pelacak().rentang("tren"):
+                    df_tren = get_db().read(
+                        lambda conn: muat_tren_skor(conn, periode, pilihan_kunci[grup], filter_data)
+                    )
+                    df_sentimen = get_db().read(lambda conn: muat_tren_sentimen(conn, periode, filter_data))
+            except Exception as e:
+                st.error(f"Gagal memuat tren: {e}")
+                df_tren = df_sentimen = pd.DataFrame()
+
+            if df_tren.empty:
+                st.info("Belum ada data untuk tren.")
+            else:
+                fig_tren = px.line(
+                    df_tren,
+                    x="periode",
+                    y="rata_rata",
+                    color="layanan",
+                    markers=True,
+                    range_y=[1, 5],
+                    title=f"Rata-rata Skor {periode} – {grup}",
+                    labels={"periode": "Periode", "rata_rata": "Rata-rata Skor", "layanan": "Layanan"},
+                    hover_data=["jumlah", "simpangan_baku"],
                 )
+                st.plotly_chart(fig_tren, width="stretch")
+                if not df_sentimen.empty:
+                    fig_sentimen = px.bar(
+                        df_sentimen,
+                        x="periode",
+                        y="persen",
+                        color="sentimen",
+                        facet_row="layanan",
+                        category_orders={"sentimen": ["Positif", "Netral", "Negatif"]},
+                        color_discrete_map={"Positif": "#2ca02c", "Netral": "#bbbbbb", "Negatif": "#d62728"},
+                        title=f"Sebaran Sentimen Responden {periode}",
+                        labels={"periode": "Periode", "persen": "% Responden", "sentimen": "Sentimen"},
+                        hover_data=["jumlah"],
+                    )
+                    st.plotly_chart(fig_sentimen, width="stretch")
+
+            # 8) Umum vs BPJS (bootstrap atas histogram skor dari rollup, tanpa loop per responden)
+            st.subheader("8. Perbandingan Umum vs BPJS")
+            st.caption(
+                f"Selisih = BPJS − Umum, interval bootstrap {TINGKAT_KEPERCAYAAN:.0%} dari {JUMLAH_RESAMPLE:,} resample. "
+                "Hanya filter tanggal yang diterapkan."
+            )
+            try:
+                with get_pelacak().rentang("bootstrap"):
+                    distribusi = get_db().read(
+                        lambda conn: muat_distribusi_skor(conn, {"tanggal": filter_data["tanggal"]})
+                    )
+                    df_banding = bandingkan_layanan(distribusi)
+                    perlakuan = ringkas_item(distribusi, "BPJS", KUNCI_PERLAKUAN_SETARA)
             except Exception as e:
-                st.error(f"Gagal membuat file Excel: {e}")
+                st.error(f"Gagal menghitung perbandingan layanan: {e}")
+                df_banding, perlakuan = pd.DataFrame(), None
+
+            if df_banding.empty or not (df_banding["n_umum"].gt(1) & df_banding["n_bpjs"].gt(1)).any():
+                st.info("Perlu jawaban dari pasien Umum dan BPJS untuk membandingkan layanan.")
+            else:
+                if perlakuan is not None:
+                    st.metric(
+                        "BPJS: “Tidak ada perbedaan perlakuan dengan pasien umum” (b6)",
+                        f"{perlakuan['persen_setuju']:.1f}% setuju",
+                        help=f"n = {perlakuan['n']:,}; skor ≥ 4 dianggap setuju.",
+                    )
+                    st.caption(
+                        f"Interval: {perlakuan['setuju_bawah']:.1f}–{perlakuan['setuju_atas']:.1f}% setuju; "
+                        f"rata-rata skor {perlakuan['rata']:.2f} "
+                        f"({perlakuan['rata_bawah']:.2f}–{perlakuan['rata_atas']:.2f})."
+                    )
+                fig_banding = px.scatter(
+                    df_banding,
+                    x="selisih",
+                    y="aspek",
+                    color="berbeda",
+                    error_x=df_banding["selisih_atas"] - df_banding["selisih"],
+                    error_x_minus=df_banding["selisih"] - df_banding["selisih_bawah"],
+                    color_discrete_map={True: "#d62728", False: "#7f7f7f"},
+                    title="Selisih Rata-rata Skor (BPJS − Umum)",
+                    labels={"selisih": "Selisih rata-rata skor", "aspek": "", "berbeda": "Interval tidak memuat 0"},
+                    hover_data=["n_umum", "n_bpjs", "cohen_d", "cliff_delta"],
+                )
+                fig_banding.add_vline(x=0, line_dash="dash", line_color="black")
+                st.plotly_chart(fig_banding, width="stretch")
+                st.dataframe(
+                    df_banding.drop(columns=["berbeda"]).round(3),
+                    width="stretch",
+                    hide_index=True,
+                )
+
+        # Panel kinerja: rincian rerun terakhir + query paling lambat
+        with st.expander("⏱️ Performance", expanded=False):
+            pelacak = get_pelacak()
+            rerun = pelacak.rerun_terakhir()
+            if rerun:
+                st.markdown("**Rerun terakhir (ms)**")
+                st.dataframe(
+                    pd.DataFrame([
+                        {
+                            "waktu": datetime.datetime.fromtimestamp(r["mulai"]).strftime("%H:%M:%S"),
+                            "halaman": r["halaman"],
+                            "total": round(r["total_ms"], 1),
+                            "query": round(r["query_ms"], 1),
+                            "jumlah_query": r["jumlah_query"],
+                            **{k: round(v, 1) for k, v in r["rentang"].items()},
+                        }
+                        for r in rerun
+                    ]),
+                    width="stretch",
+                )
+            query = pelacak.query_terlambat()
+            if query:
+                st.markdown("**Query paling lambat**")
+                st.dataframe(
+                    pd.DataFrame([
+                        {
+                            "maks_ms": round(q["maks_ms"], 2),
+                            "rata2_ms": round(q["total_ms"] / q["jumlah"], 2),
+                            "jumlah": q["jumlah"],
+                            "sql": pola,
+                        }
+                        for pola, q in query
+                    ]),
+                    width="stretch",
+                )
 
     elif password:  # password diisi tapi salah
         st.sidebar.error("Password salah. Coba lagi.")
@@ -501,3 +777,4 @@ Klinik Pratama Theresia adalah fasilitas kesehatan yang berkomitmen memberikan p
 📧 *Email:* info@kliniktheresia.id
 """)
 
+get_pelacak().selesai_rerun()
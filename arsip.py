@@ -0,0 +1,428 @@
+"""Arsip bulanan: bulan yang sudah tutup dipindah ke berkas SQLite per bulan.
+
+Responden bulan lama beserta jawaban, saran, skor dan cluster-nya disalin ke
+<db>_arsip/<db>_YYYY-MM.<n>.db di sebelah database utama (skema sama, tanpa
+trigger), lalu dihapus dari database utama dalam satu transaksi bersama
+pencatatan di tabel arsip_bulan. Direktori dan awalan nama berkas diturunkan
+dari path database, jadi database lain (staging, benchmark) tidak pernah
+menyentuh arsip milik database ini. Berkas arsip tidak pernah diubah: data
+susulan untuk bulan yang sudah diarsip menghasilkan berkas baru (<n> naik);
+berkas dengan <n> lebih kecil dibuang setelah masa tenggang.
+Rollup (rollup_sentimen_harian, rollup_skor_harian) tetap di database utama.
+
+Lapisan query (Arsip.baca, hitung_baris, ambil_halaman, koneksi) menjalankan
+query yang sama di partisi live dan di setiap berkas arsip yang bulannya
+beririsan dengan rentang tanggal filter, lalu menggabungkan hasilnya. Daftar
+arsip dibaca di snapshot yang sama dengan data live, jadi baris yang sedang
+dipindah tidak pernah terhitung dua kali. Model kluster hanya dilatih ulang
+dari partisi live; responden arsip menyimpan cluster saat diarsipkan, jadi
+model diperbarui dulu sebelum tiap bulan disalin.
+
+    python arsip.py --sisakan 3   # arsipkan semua bulan sebelum 3 bulan terakhir
+"""
+import argparse
+import datetime
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from db import Database, ambil_halaman, cari_saran, hitung_baris, hitung_cari_saran, hubungkan, versi_data
+from migrasi import jalankan_migrasi
+
+logger = logging.getLogger("survei.arsip")
+
+BASE_DIR = Path(__file__).resolve().parent
+BULAN_LIVE = 3  # bulan terakhir (termasuk bulan berjalan) yang tetap di database utama
+MASA_TENGGANG_DETIK = 3600  # berkas arsip usang dihapus setelah tidak dipakai selama ini
+MAKS_CACHE_HITUNG = 256  # kombinasi (tabel, filter) yang jumlah barisnya disimpan per versi data
+
+# tabel yang ikut dipindah (urut: induk dulu) + tabel lookup & view yang disalin utuh
+TABEL_ARSIP = ["responden", "jawaban_data", "saran_masukan", "skor_responden", "kluster_responden"]
+TABEL_LOOKUP = ["pertanyaan", "label_jawaban"]
+VIEW_ARSIP = ["jawaban", "responden_saran"]
+FTS_ARSIP = ["saran_fts"]  # indeks FTS5 (external content), dibangun ulang di berkas arsip
+# rollup disimpan apa adanya saat baris sumbernya dihapus dari partisi live
+ROLLUP = {"rollup_sentimen_harian": "hari", "rollup_skor_harian": "hari"}
+
+
+def direktori_arsip(path_db):
+    """Direktori arsip milik database path_db: <stem>_arsip/ di sebelahnya."""
+    path_db = Path(path_db)
+    return path_db.with_name(f"{path_db.stem}_arsip")
+
+
+def _awalan(path_db):
+    """Awalan nama berkas arsip milik database path_db."""
+    return f"{Path(path_db).stem}_"
+
+
+def _rentang_bulan(bulan):
+    """'2024-05' -> ('2024-05-01', '2024-06-01')."""
+    tahun, nomor = map(int, bulan.split("-"))
+    tahun_akhir, nomor_akhir = (tahun + 1, 1) if nomor == 12 else (tahun, nomor + 1)
+    return f"{bulan}-01", f"{tahun_akhir:04d}-{nomor_akhir:02d}-01"
+
+
+def _batas_arsip(sekarang, sisakan_bulan):
+    """Tanggal awal bulan pertama yang tetap live."""
+    indeks = sekarang.year * 12 + sekarang.month - 1 - (sisakan_bulan - 1)
+    return f"{indeks // 12:04d}-{indeks % 12 + 1:02d}-01"
+
+
+def _responden_bulan(skema=""):
+    return f"SELECT id FROM {skema}responden WHERE tanggal >= ? AND tanggal < ? AND id <= ?"
+
+
+def daftar_arsip(conn):
+    """Semua baris arsip_bulan, bulan terbaru dulu."""
+    kolom = ["bulan", "berkas", "jumlah_responden", "id_min", "id_max"]
+    return [
+        dict(zip(kolom, row))
+        for row in conn.execute(f"SELECT {', '.join(kolom)} FROM arsip_bulan ORDER BY bulan DESC")
+    ]
+
+
+def versi_hitung(conn):
+    """Kunci cache jumlah baris: versi_data + daftar berkas arsip (baca lewat db.snapshot)."""
+    return versi_data(conn), tuple(info["berkas"] for info in daftar_arsip(conn))
+
+
+def _beririsan(daftar, rentang):
+    """Arsip yang bulannya beririsan dengan rentang (date_awal, date_akhir); None = semua."""
+    if not rentang:
+        return daftar
+    awal, akhir = rentang
+    return [
+        info for info in daftar
+        if f"{info['bulan']}-01" <= akhir.isoformat() and info["bulan"] >= awal.isoformat()[:7]
+    ]
+
+
+def _python(nilai):
+    """Skalar numpy -> skalar Python (supaya bisa dipakai sebagai parameter sqlite3)."""
+    return nilai.item() if hasattr(nilai, "item") else nilai
+
+
+class Arsip:
+    """Berkas arsip di `direktori` + lapisan query gabungan live & arsip."""
+
+    def __init__(self, direktori, trace=None):
+        """trace: callable opsional (sql, durasi_detik) untuk query arsip, seperti Database(trace=...)."""
+        self.direktori = Path(direktori)
+        self._trace = trace
+        self._lock = threading.Lock()
+        self._koneksi = {}  # berkas -> (conn, lock), berkas arsip tidak pernah berubah
+        self.gagal = {}  # berkas -> pesan error, untuk partisi yang tidak bisa dibaca
+        self._versi_hitung = None
+        self._hitung = {}  # (tabel, filter) -> jumlah baris pada _versi_hitung
+
+    # -------------------- QUERY --------------------
+    def _buka(self, berkas):
+        path = (self.direktori / berkas).resolve()
+        # immutable: tanpa lock/WAL, berkas arsip hanya pernah dibaca
+        return hubungkan(
+            f"{path.as_uri()}?mode=ro&immutable=1", trace=self._trace, uri=True, check_same_thread=False
+        )
+
+    def _pinjam(self, berkas):
+        with self._lock:
+            item = self._koneksi.get(berkas)
+            if item is None:
+                item = self._koneksi[berkas] = (self._buka(berkas), threading.Lock())
+            return item
+
+    def _lupakan_usang(self, dipakai):
+        # tidak di-close di sini: thread lain mungkin masih memakainya (ditutup saat GC)
+        with self._lock:
+            for berkas in [b for b in self._koneksi if b not in dipakai]:
+                del self._koneksi[berkas]
+            for berkas in [b for b in self.gagal if b not in dipakai]:
+                del self.gagal[berkas]
+
+    def baca(self, db, fn, rentang=None):
+        """fn(conn) di partisi live lalu di tiap arsip yang dibutuhkan rentang. Return list hasil.
+
+        Arsip yang hilang atau tidak bisa dibuka dilewati, dicatat di `gagal` dan di log.
+        """
+        # daftar arsip & data live dari snapshot yang sama; koneksi live sudah
+        # kembali ke pool sebelum arsip dibaca
+        hasil, daftar = db.snapshot(lambda conn: ([fn(conn)], daftar_arsip(conn)))
+        self._lupakan_usang({info["berkas"] for info in daftar})
+        for info in _beririsan(daftar, rentang):
+            berkas = info["berkas"]
+            try:
+                arsip_conn, lock = self._pinjam(berkas)
+                with lock:
+                    hasil.append(fn(arsip_conn))
+            except sqlite3.OperationalError as e:
+                with self._lock:
+                    self._koneksi.pop(berkas, None)
+                    baru = berkas not in self.gagal
+                    self.gagal[berkas] = str(e)
+                if baru:
+                    logger.warning("arsip %s (%s) tidak bisa dibaca: %s", info["bulan"], self.direktori / berkas, e)
+                continue
+            if berkas in self.gagal:
+                with self._lock:
+                    self.gagal.pop(berkas, None)
+        return hasil
+
+    @contextmanager
+    def koneksi(self, conn, rentang=None):
+        """[conn, koneksi arsip...] untuk pemanggil yang sudah membuka snapshot di conn (mis. ekspor)."""
+        daftar = [self._buka(info["berkas"]) for info in _beririsan(daftar_arsip(conn), rentang)]
+        try:
+            yield [conn] + daftar
+        finally:
+            for arsip_conn in daftar:
+                arsip_conn.close()
+
+    def hitung_baris(self, db, tabel, filter_data=None):
+        """Jumlah baris live + arsip, di-cache sampai versi data atau daftar arsip berubah."""
+        kunci = (tabel, repr(sorted((filter_data or {}).items())))
+        versi = db.snapshot(versi_hitung)
+        with self._lock:
+            if versi != self._versi_hitung:
+                self._versi_hitung, self._hitung = versi, {}
+            elif kunci in self._hitung:
+                return self._hitung[kunci]
+        rentang = (filter_data or {}).get("tanggal")
+        jumlah = sum(self.baca(db, lambda conn: hitung_baris(conn, tabel, filter_data), rentang))
+        with self._lock:
+            # jumlah tanpa partisi yang gagal dibaca tidak disimpan
+            if versi == self._versi_hitung and not self.gagal:
+                if len(self._hitung) >= MAKS_CACHE_HITUNG:
+                    self._hitung.clear()
+                self._hitung[kunci] = jumlah
+        return jumlah
+
+    def ambil_halaman(self, db, tabel, filter_data=None, urut="id", menurun=True, kursor=None, ukuran=50):
+        """db.ambil_halaman atas gabungan live + arsip; kursor berlaku di semua partisi."""
+        rentang = (filter_data or {}).get("tanggal")
+        hasil = self.baca(
+            db,
+            lambda conn: ambil_halaman(conn, tabel, filter_data, urut, menurun, kursor, ukuran),
+            rentang,
+        )
+        if len(hasil) == 1:
+            return hasil[0]
+        frames = [df for df, _ in hasil if not df.empty]
+        if not frames:
+            return hasil[0]
+        kolom = ["id"] if urut == "id" else [urut, "id"]
+        gabung = pd.concat(frames, ignore_index=True).sort_values(
+            kolom, ascending=[not menurun] + [True] * (len(kolom) - 1), kind="stable"
+        )
+        # tiap partisi sudah memberi halamannya sendiri; halaman gabungan = ukuran teratas
+        masih_ada = len(gabung) > ukuran or any(berikutnya is not None for _, berikutnya in hasil)
+        df = gabung.head(ukuran).reset_index(drop=True)
+        berikutnya = None
+        if masih_ada:
+            berikutnya = (_python(df[urut].iloc[-1]), _python(df["id"].iloc[-1]))
+        return df, berikutnya
+
+    def cari_saran(self, db, kueri, filter_data=None, halaman=0, ukuran=20):
+        """db.cari_saran atas gabungan live + arsip. Return (DataFrame halaman, total cocok)."""
+        rentang = (filter_data or {}).get("tanggal")
+        batas = (halaman + 1) * ukuran
+        hasil = self.baca(
+            db,
+            lambda conn: (cari_saran(conn, kueri, filter_data, batas=batas),
+                          hitung_cari_saran(conn, kueri, filter_data)),
+            rentang,
+        )
+        frames = [df for df, _ in hasil if not df.empty]
+        total = sum(n for _, n in hasil)
+        if not frames:
+            return hasil[0][0], total
+        # bm25 tiap partisi dihitung dari indeksnya sendiri; cukup untuk mengurutkan gabungan
+        gabung = pd.concat(frames, ignore_index=True).sort_values(["skor", "id"], kind="stable")
+        return gabung.iloc[halaman * ukuran:batas].reset_index(drop=True), total
+
+    # -------------------- PENGARSIPAN --------------------
+    def arsipkan(self, db, sisakan_bulan=BULAN_LIVE, sekarang=None):
+        """Pindahkan semua bulan sebelum `sisakan_bulan` bulan terakhir ke arsip. Return daftar bulan."""
+        sekarang = sekarang or datetime.date.today()
+        batas = _batas_arsip(sekarang, sisakan_bulan)
+        self.direktori.mkdir(parents=True, exist_ok=True)
+        self.bersihkan(db)
+        daftar_bulan = db.read(lambda conn: [
+            row[0] for row in conn.execute(
+                "SELECT DISTINCT substr(tanggal, 1, 7) FROM responden WHERE tanggal < ? ORDER BY 1", (batas,)
+            )
+        ])
+        for bulan in daftar_bulan:
+            self._arsipkan_bulan(db, bulan)
+        if daftar_bulan:
+            db.vacuum()  # halaman kosong bekas data yang dipindah dikembalikan ke OS
+        return daftar_bulan
+
+    def _arsipkan_bulan(self, db, bulan):
+        awal, akhir = _rentang_bulan(bulan)
+
+        def _info(conn):
+            lama = conn.execute("SELECT berkas FROM arsip_bulan WHERE bulan = ?", (bulan,)).fetchone()
+            id_max = conn.execute(
+                "SELECT MAX(id) FROM responden WHERE tanggal >= ? AND tanggal < ?", (awal, akhir)
+            ).fetchone()[0]
+            return (lama[0] if lama else None), id_max
+
+        lama, id_max = db.read(_info)
+        if id_max is None:
+            return
+        # model hanya dilatih dari partisi live: responden s.d. id_max harus sudah
+        # punya cluster sebelum disalin (mis. impor kertas bertanggal mundur)
+        from kluster import ModelKluster  # scikit-learn hanya dimuat saat mengarsipkan
+
+        ModelKluster().perbarui(db)
+        nomor = int(lama.rsplit(".", 2)[1]) + 1 if lama else 1
+        berkas = f"{_awalan(db.path)}{bulan}.{nomor}.db"
+        tmp = self.direktori / f"{berkas}.tmp"
+        tmp.unlink(missing_ok=True)
+        if lama:
+            shutil.copyfile(self.direktori / lama, tmp)
+        try:
+            jumlah_baru, ringkas = self._salin(db.path, tmp, awal, akhir, id_max)
+            os.replace(tmp, self.direktori / berkas)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        db.write(lambda conn: self._hapus_live(conn, bulan, berkas, awal, akhir, id_max, jumlah_baru, ringkas))
+
+    def _salin(self, path_db, tmp, awal, akhir, id_max):
+        """Salin baris bulan ini dari database utama ke berkas tmp. Return (baris baru, ringkasan)."""
+        conn = sqlite3.connect(tmp, isolation_level=None)
+        try:
+            conn.execute("ATTACH DATABASE ? AS live", (str(path_db),))
+            conn.execute("BEGIN")
+            # DDL tabel, indeks & view diambil dari skema live (trigger tidak ikut); berkas
+            # salinan arsip lama hanya mendapat objek yang belum dimilikinya
+            objek = TABEL_ARSIP + TABEL_LOOKUP + VIEW_ARSIP + FTS_ARSIP
+            ddl = conn.execute(
+                "SELECT name, sql FROM live.sqlite_master WHERE sql IS NOT NULL AND tbl_name IN "
+                f"({', '.join('?' * len(objek))}) "
+                "AND type IN ('table', 'index', 'view') "
+                "ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END",
+                objek,
+            ).fetchall()
+            ada = {row[0] for row in conn.execute("SELECT name FROM main.sqlite_master")}
+            for nama, sql in ddl:
+                if nama not in ada:
+                    conn.execute(sql)
+            for tabel in TABEL_LOOKUP:
+                conn.execute(f"INSERT OR IGNORE INTO main.{tabel} SELECT * FROM live.{tabel}")
+            sebelum = conn.execute("SELECT COUNT(*) FROM main.responden").fetchone()[0]
+            params = (awal, akhir, id_max)
+            conn.execute(
+                "INSERT OR IGNORE INTO main.responden SELECT * FROM live.responden "
+                "WHERE tanggal >= ? AND tanggal < ? AND id <= ?",
+                params,
+            )
+            for tabel in TABEL_ARSIP[1:]:
+                conn.execute(
+                    f"INSERT OR IGNORE INTO main.{tabel} SELECT * FROM live.{tabel} "
+                    f"WHERE responden_id IN ({_responden_bulan('live.')})",
+                    params,
+                )
+            for nama in FTS_ARSIP:
+                if any(n == nama for n, _ in ddl):
+                    conn.execute(f"INSERT INTO main.{nama} ({nama}) VALUES ('rebuild')")
+            tanpa_kluster = conn.execute(
+                "SELECT COUNT(*) FROM main.skor_responden s "
+                "WHERE s.jumlah_layanan > 0 AND s.jumlah_keseluruhan > 0 "
+                "AND NOT EXISTS (SELECT 1 FROM main.kluster_responden k WHERE k.responden_id = s.responden_id)"
+            ).fetchone()[0]
+            if tanpa_kluster and conn.execute("SELECT 1 FROM live.model_kluster LIMIT 1").fetchone():
+                # responden arsip tidak pernah dilatih ulang: jangan pindahkan tanpa cluster
+                raise RuntimeError(f"{tanpa_kluster} responden belum punya cluster; jalankan ulang pengarsipan")
+            jumlah, id_min_arsip, id_max_arsip = conn.execute(
+                "SELECT COUNT(*), MIN(id), MAX(id) FROM main.responden"
+            ).fetchone()
+            conn.execute("COMMIT")
+            conn.execute("DETACH DATABASE live")
+        finally:
+            conn.close()
+        with open(tmp, "rb+") as f:
+            os.fsync(f.fileno())
+        return jumlah - sebelum, (jumlah, id_min_arsip, id_max_arsip)
+
+    def _hapus_live(self, conn, bulan, berkas, awal, akhir, id_max, jumlah_baru, ringkas):
+        params = (awal, akhir, id_max)
+        live = conn.execute(f"SELECT COUNT(*) FROM ({_responden_bulan()})", params).fetchone()[0]
+        if live != jumlah_baru:
+            raise RuntimeError(
+                f"Arsip {bulan}: {jumlah_baru} responden disalin tapi {live} ada di database utama"
+            )
+        # trigger delete mengurangi rollup; nilai bulan ini dikembalikan sesudahnya
+        simpan = {
+            tabel: conn.execute(f"SELECT * FROM {tabel} WHERE {kolom} >= ? AND {kolom} < ?", (awal, akhir)).fetchall()
+            for tabel, kolom in ROLLUP.items()
+        }
+        for tabel in reversed(TABEL_ARSIP[1:]):
+            conn.execute(f"DELETE FROM {tabel} WHERE responden_id IN ({_responden_bulan()})", params)
+        conn.execute(f"DELETE FROM responden WHERE id IN ({_responden_bulan()})", params)
+        for tabel, rows in simpan.items():
+            if rows:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {tabel} VALUES ({', '.join('?' * len(rows[0]))})", rows
+                )
+        conn.execute(
+            "INSERT OR REPLACE INTO arsip_bulan (bulan, berkas, jumlah_responden, id_min, id_max) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (bulan, berkas, *ringkas),
+        )
+
+    def bersihkan(self, db):
+        """Hapus berkas milik db yang sudah digantikan versi lebih baru, setelah masa tenggang.
+
+        Hanya berkas berawalan nama db yang dihapus: .tmp sisa pengarsipan yang
+        gagal, dan berkas bulan yang di arsip_bulan sudah tercatat dengan <n>
+        lebih besar. Berkas bulan yang tidak tercatat sama sekali dibiarkan.
+        """
+        if not self.direktori.exists():
+            return
+        nomor_aktif = {
+            info["bulan"]: int(info["berkas"].rsplit(".", 2)[1]) for info in db.read(daftar_arsip)
+        }
+        pola = re.compile(rf"{re.escape(_awalan(db.path))}(\d{{4}}-\d{{2}})\.(\d+)\.db(\.tmp)?")
+        sekarang = time.time()
+        for path in self.direktori.iterdir():
+            cocok = pola.fullmatch(path.name)
+            if not cocok:
+                continue
+            bulan, nomor, tmp = cocok.group(1), int(cocok.group(2)), cocok.group(3)
+            if not tmp and not nomor < nomor_aktif.get(bulan, 0):
+                continue
+            try:
+                if sekarang - path.stat().st_mtime > MASA_TENGGANG_DETIK:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pindahkan bulan lama ke berkas arsip bulanan.")
+    parser.add_argument("--db", default=os.environ.get("SURVEI_DB_PATH", BASE_DIR / "survei_klinik.db"))
+    parser.add_argument("--sisakan", type=int, default=BULAN_LIVE,
+                        help="jumlah bulan terakhir (termasuk bulan ini) yang tetap di database utama")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    try:
+        jalankan_migrasi(db)
+        bulan = Arsip(direktori_arsip(args.db)).arsipkan(db, sisakan_bulan=args.sisakan)
+    finally:
+        db.close()
+    print(f"{len(bulan)} bulan diarsipkan" + (f": {', '.join(bulan)}" if bulan else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Turunan gambar halaman (resize + kompres ulang) yang dibuat sekali per proses.
+
+st.image mengubah ukuran dan meng-encode ulang gambar yang lebih lebar dari
+`width` atau yang bukan JPEG/PNG pada setiap rerun. Karena itu turunan dibuat
+tepat selebar tampilan: WebP dikirim sebagai data URL (diteruskan apa adanya
+oleh Streamlit), JPEG hanya dipakai bila Pillow tidak mendukung WebP.
+"""
+import base64
+import io
+import threading
+from pathlib import Path
+
+from PIL import Image, ImageOps, features
+
+KUALITAS_WEBP = 75
+KUALITAS_JPEG = 82
+LEBAR_PENUH = 960  # untuk gambar use_container_width
+
+# file -> lebar tampilan (px) yang dipakai halaman
+ASET = {
+    "logo.jpeg": [250, 100],  # sidebar, header
+    "staf.jpg": [LEBAR_PENUH],  # Beranda
+    "ftbersama.jpg": [300],  # Tentang Klinik
+    "penerima.jpg": [310],
+    "piagam.jpg": [280],
+    "plakat.jpg": [300],
+}
+
+
+def buat_turunan(path, lebar, webp=True):
+    """Resize (tanpa memperbesar) lalu encode ke WebP data URL atau JPEG bytes."""
+    with Image.open(path) as im:
+        im = ImageOps.exif_transpose(im).convert("RGB")
+        if im.width > lebar:
+            im = im.resize((lebar, round(im.height * lebar / im.width)), Image.LANCZOS)
+        buf = io.BytesIO()
+        if webp:
+            im.save(buf, "WEBP", quality=KUALITAS_WEBP, method=6)
+            return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+        im.save(buf, "JPEG", quality=KUALITAS_JPEG, optimize=True, progressive=True)
+        return buf.getvalue()
+
+
+class PustakaAset:
+    """Turunan gambar di memori, dibuat saat pertama dipakai lalu dipakai ulang."""
+
+    def __init__(self, base_dir):
+        self.base_dir = Path(base_dir)
+        self.webp = features.check("webp")
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def gambar(self, nama, lebar):
+        """Data untuk st.image(..., width=lebar)."""
+        kunci = (nama, lebar)
+        data = self._cache.get(kunci)
+        if data is None:
+            with self._lock:
+                data = self._cache.get(kunci)
+                if data is None:
+                    data = buat_turunan(self.base_dir / nama, lebar, webp=self.webp)
+                    self._cache[kunci] = data
+        return data
+
+    def siapkan_semua(self):
+        """Bangun semua turunan di ASET sekaligus (dipanggil saat startup)."""
+        for nama, daftar_lebar in ASET.items():
+            for lebar in daftar_lebar:
+                self.gambar(nama, lebar)
+        return self
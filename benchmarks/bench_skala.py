@@ -0,0 +1,222 @@
+"""Benchmark skala: waktu & memori fungsi data utama pada berbagai ukuran data.
+
+Untuk tiap ukuran, database sementara diisi data sintetis (data_sintetis.py)
+lalu tiap operasi dijalankan headless tanpa Streamlit:
+
+    tabel_dashboard[_filter]          bagian 1-4 dashboard: Arsip.hitung_baris + Arsip.ambil_halaman
+    halaman_tabel                     Arsip.ambil_halaman, halaman pertama & halaman dalam
+    prepare_cluster_data              db.muat_skor_responden
+    kmeans_penuh / kmeans_inkremental kluster.ModelKluster.perbarui
+    ekspor_<format>                   ekspor.ekspor (pengganti generate_excel)
+    simpan_ke_db                      db.PenulisBatch.submit dari beberapa thread
+
+Dengan --sisakan-bulan N, bulan sebelum N bulan terakhir dipindah ke berkas
+arsip dulu (arsip.py) sehingga operasi dashboard ikut membaca partisi arsip.
+
+Waktu diukur tanpa tracemalloc; memori puncak (alokasi Python/NumPy, bukan
+cache internal SQLite) diukur di satu run tambahan dengan tracemalloc.
+Hasil berupa JSON, satu record per (ukuran, operasi).
+
+    python benchmarks/bench_skala.py --ukuran 1000 10000 100000 --output hasil.json
+"""
+import argparse
+import json
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from data_sintetis import isi_database  # noqa: E402
+from arsip import Arsip, direktori_arsip  # noqa: E402
+from db import TABEL_HALAMAN, Database, PenulisBatch, muat_skor_responden  # noqa: E402
+
+JAWABAN_CONTOH = (
+    [(f"u{i}", "🙂 Puas", 4) for i in range(1, 11)]
+    + [(f"k{i}", "😄 Sangat Puas", 5) for i in range(1, 4)]
+)
+
+
+def _persentil(data, p):
+    data = sorted(data)
+    return data[min(len(data) - 1, int(round(p / 100 * (len(data) - 1))))]
+
+
+def ukur(fn, ulang=5, per_item=1):
+    """Jalankan fn `ulang` kali; return statistik latensi, throughput & memori puncak."""
+    waktu = []
+    for _ in range(ulang):
+        t0 = time.perf_counter()
+        fn()
+        waktu.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, puncak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return _statistik(waktu, per_item, puncak)
+
+
+def _statistik(waktu, per_item, puncak=None):
+    return {
+        "n": len(waktu),
+        "p50_ms": _persentil(waktu, 50) * 1000,
+        "p95_ms": _persentil(waktu, 95) * 1000,
+        "p99_ms": _persentil(waktu, 99) * 1000,
+        "throughput_per_s": per_item * len(waktu) / sum(waktu) if sum(waktu) else None,
+        "puncak_mem_mb": puncak / 1024 ** 2 if puncak is not None else None,
+    }
+
+
+def ukur_simpan(db, jumlah, thread):
+    """Latensi per submit & throughput submission lewat antrian group commit."""
+    penulis = PenulisBatch(db)
+    latensi = []
+    lock = threading.Lock()
+
+    def kirim(n):
+        for _ in range(n):
+            t0 = time.perf_counter()
+            penulis.submit("Bench", "Perempuan", "21–30 tahun", "Umum", JAWABAN_CONTOH, "")
+            with lock:
+                latensi.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    pekerja = [threading.Thread(target=kirim, args=(jumlah // thread,)) for _ in range(thread)]
+    for p in pekerja:
+        p.start()
+    for p in pekerja:
+        p.join()
+    total = time.perf_counter() - t0
+    penulis.close()
+    hasil = _statistik(latensi, 1)
+    hasil["throughput_per_s"] = len(latensi) / total
+    hasil["thread"] = thread
+    return hasil
+
+
+def rerun_tabel(db, arsip, filter_data):
+    """Query bagian 1-4 dashboard dalam satu rerun (halaman pertama tiap tabel)."""
+    arsip.hitung_baris(db, "responden")
+    arsip.hitung_baris(db, "responden", filter_data)
+    for tabel, (_, _, kolom_urut) in TABEL_HALAMAN.items():
+        arsip.ambil_halaman(db, tabel, filter_data, urut=kolom_urut[0])
+
+
+def bench_ukuran(ukuran, args, tmp):
+    from ekspor import ekspor
+    from kluster import ModelKluster
+
+    path = Path(tmp) / f"bench_{ukuran}.db"
+    t0 = time.perf_counter()
+    isi_database(path, ukuran)
+    hasil = {"isi_data": {"detik": time.perf_counter() - t0}}
+    db = Database(path)
+    arsip = Arsip(direktori_arsip(path))
+    if args.sisakan_bulan is not None:
+        t0 = time.perf_counter()
+        bulan = arsip.arsipkan(db, sisakan_bulan=args.sisakan_bulan)
+        hasil["arsipkan"] = {"detik": time.perf_counter() - t0, "bulan": len(bulan)}
+    lewati = set(args.lewati)
+    ulang = args.ulang
+
+    try:
+        if "tabel_dashboard" not in lewati:
+            hasil["tabel_dashboard"] = ukur(lambda: rerun_tabel(db, arsip, {}), ulang=ulang * 4)
+            hasil["tabel_dashboard_filter"] = ukur(
+                lambda: rerun_tabel(db, arsip, {"layanan": ["BPJS"], "usia": ["21–30 tahun"]}), ulang=ulang * 4
+            )
+
+        if "halaman_tabel" not in lewati:
+            hasil["halaman_tabel"] = ukur(
+                lambda: arsip.ambil_halaman(db, "jawaban", ukuran=50), ulang=ulang * 4
+            )
+            # halaman jauh di belakang: kursor di tengah tabel
+            tengah = (ukuran // 2, 1)
+            hasil["halaman_tabel_dalam"] = ukur(
+                lambda: arsip.ambil_halaman(db, "jawaban", urut="responden_id", kursor=tengah, ukuran=50),
+                ulang=ulang * 4,
+            )
+
+        if "prepare_cluster_data" not in lewati:
+            hasil["prepare_cluster_data"] = ukur(lambda: db.read(muat_skor_responden), ulang=ulang)
+
+        if "kmeans" not in lewati:
+            hasil["kmeans_penuh"] = ukur(
+                lambda: ModelKluster().perbarui(db, latih_ulang=True), ulang=max(1, ulang // 2)
+            )
+
+        if "ekspor" not in lewati:
+            for fmt in args.format:
+                hasil[f"ekspor_{fmt.split()[0].lower()}"] = ukur(
+                    lambda: ekspor(db, fmt, Path(tmp) / "ekspor.out", arsip=arsip), ulang=1
+                )
+
+        if "simpan_ke_db" not in lewati:
+            hasil["simpan_ke_db"] = ukur_simpan(db, args.submit, args.thread)
+            if "kmeans" not in lewati:
+                # model dari kmeans_penuh + responden yang baru disimpan
+                model = ModelKluster()
+                t0 = time.perf_counter()
+                model.perbarui(db)
+                hasil["kmeans_inkremental"] = _statistik([time.perf_counter() - t0], args.submit)
+    finally:
+        db.close()
+    return hasil
+
+
+def _commit_git():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark skala fungsi data survei.")
+    parser.add_argument("--ukuran", type=int, nargs="+", default=[1_000, 10_000],
+                        help="jumlah responden sintetis, mis. 1000 10000 100000 1000000")
+    parser.add_argument("--ulang", type=int, default=5, help="pengulangan per operasi")
+    parser.add_argument("--submit", type=int, default=400, help="jumlah submission untuk simpan_ke_db")
+    parser.add_argument("--thread", type=int, default=8, help="thread pengirim untuk simpan_ke_db")
+    parser.add_argument("--sisakan-bulan", type=int,
+                        help="arsipkan dulu semua bulan sebelum N bulan terakhir (default: tanpa arsip)")
+    parser.add_argument("--format", nargs="+", default=["CSV (zip)", "Parquet (zip)", "Excel"])
+    parser.add_argument("--lewati", nargs="*", default=[],
+                        help="operasi yang dilewati: tabel_dashboard halaman_tabel prepare_cluster_data kmeans ekspor simpan_ke_db")
+    parser.add_argument("--output", help="tulis hasil JSON ke file ini juga")
+    args = parser.parse_args()
+
+    laporan = {
+        "benchmark": "skala",
+        "waktu": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit_git(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "hasil": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for ukuran in args.ukuran:
+            for operasi, statistik in bench_ukuran(ukuran, args, tmp).items():
+                laporan["hasil"].append({"ukuran": ukuran, "operasi": operasi, **statistik})
+                print(f"{ukuran:>9} {operasi:<22} {json.dumps(statistik)}", file=sys.stderr)
+
+    teks = json.dumps(laporan, indent=2)
+    print(teks)
+    if args.output:
+        Path(args.output).write_text(teks, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark startup & rerun halaman Formulir Survei (headless, lewat AppTest).
+
+Mengukur cold start (run pertama di proses baru) dan waktu per rerun, lalu
+membandingkannya dengan ANGGARAN. Hasil dicetak sebagai JSON; exit code 1
+bila ada anggaran yang terlampaui atau modul analitik ikut ter-import.
+
+    python benchmarks/bench_startup.py [--rerun 30] [--output hasil.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+ANGGARAN = {
+    "cold_start_s": 5.0,
+    "rerun_p95_ms": 150.0,
+}
+# tidak boleh ter-import hanya karena membuka formulir
+# (plotly.graph_objects sudah dimuat oleh streamlit sendiri, jadi yang dicek plotly.express)
+MODUL_BERAT = ["sklearn", "plotly.express"]
+
+
+def ukur(jumlah_rerun):
+    from streamlit.testing.v1 import AppTest
+
+    hasil = {}
+    t0 = time.perf_counter()
+    at = AppTest.from_file(str(BASE_DIR / "app.py"), default_timeout=60).run()
+    hasil["cold_start_s"] = time.perf_counter() - t0
+    if at.exception:
+        raise RuntimeError(f"app.py gagal dijalankan: {at.exception}")
+
+    waktu = []
+    for _ in range(jumlah_rerun):
+        t0 = time.perf_counter()
+        at.run()
+        waktu.append((time.perf_counter() - t0) * 1000)
+    waktu.sort()
+    hasil["rerun_p50_ms"] = statistics.median(waktu)
+    hasil["rerun_p95_ms"] = waktu[min(len(waktu) - 1, int(len(waktu) * 0.95))]
+    hasil["modul_berat_terimport"] = [m for m in MODUL_BERAT if m in sys.modules]
+    return hasil
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rerun", type=int, default=30)
+    parser.add_argument("--output", help="tulis hasil JSON ke file ini juga")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # jangan sentuh database asli
+        db_sementara = Path(tmp) / "survei_klinik.db"
+        shutil.copy(BASE_DIR / "survei_klinik.db", db_sementara)
+        os.environ["SURVEI_DB_PATH"] = str(db_sementara)
+        hasil = ukur(args.rerun)
+
+    pelanggaran = [k for k, batas in ANGGARAN.items() if hasil[k] > batas]
+    if hasil["modul_berat_terimport"]:
+        pelanggaran.append("modul_berat_terimport")
+    laporan = {
+        "benchmark": "startup",
+        "waktu": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "hasil": hasil,
+        "anggaran": ANGGARAN,
+        "lolos": not pelanggaran,
+        "pelanggaran": pelanggaran,
+    }
+    teks = json.dumps(laporan, indent=2)
+    print(teks)
+    if args.output:
+        Path(args.output).write_text(teks, encoding="utf-8")
+    return 0 if not pelanggaran else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
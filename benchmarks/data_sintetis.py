@@ -0,0 +1,124 @@
+"""Generator data survei sintetis untuk benchmark.
+
+Mengisi database kosong (skema lewat migrasi) dengan responden Umum (u1..u10)
+dan BPJS (b1..b10) plus k1..k3. Tiap responden punya "kepuasan dasar" sendiri
+dan jawabannya tersebar di sekitar nilai itu, jadi distribusi skor dan
+pengelompokan sentimen mirip data asli. Insert langsung per chunk besar
+(executemany), bukan lewat simpan_responden, supaya 1 juta responden tetap
+bisa dibuat dalam hitungan menit.
+
+    python benchmarks/data_sintetis.py hasil.db 10000
+"""
+import argparse
+import datetime
+import sys
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from db import Database  # noqa: E402
+from migrasi import jalankan_migrasi  # noqa: E402
+
+CHUNK = 10_000  # responden per transaksi
+NAMA = ["Andi", "Budi", "Citra", "Dewi", "Eka", "Fitri", "Gita", "Hendra", "Intan", "Joko"]
+USIA = ["Dibawah 20 tahun", "21–30 tahun", "31–40 tahun", "41–50 tahun", "Diatas 50 tahun"]
+JENIS_KELAMIN = ["Laki-laki", "Perempuan"]
+SARAN = [
+    "Waktu tunggu mohon dipercepat.",
+    "Pelayanan dokter sangat ramah, terima kasih.",
+    "Ruang tunggu perlu kipas angin tambahan.",
+    "Antrian BPJS terlalu lama.",
+    "Obat kadang tidak tersedia.",
+    "Petugas pendaftaran sangat membantu.",
+    "Parkir kurang luas.",
+    "Pertahankan kebersihan klinik.",
+]
+PROPORSI_SARAN = 0.3
+PROPORSI_BPJS = 0.55
+
+
+def _kunci_ke_id(conn):
+    return dict(conn.execute("SELECT kunci, id FROM pertanyaan").fetchall())
+
+
+def _chunk(rng, mulai_id, n, kunci_id, tanggal_awal, hari):
+    ids = np.arange(mulai_id, mulai_id + n)
+    bpjs = rng.random(n) < PROPORSI_BPJS
+    dasar = np.clip(rng.normal(3.6, 0.9, n), 1, 5)
+    detik = rng.integers(0, hari * 86400, n)
+    tanggal = [
+        (tanggal_awal + datetime.timedelta(seconds=int(s))).strftime("%Y-%m-%d %H:%M:%S")
+        for s in detik
+    ]
+    responden = list(zip(
+        ids.tolist(),
+        rng.choice(NAMA, n).tolist(),
+        rng.choice(JENIS_KELAMIN, n).tolist(),
+        rng.choice(USIA, n).tolist(),
+        np.where(bpjs, "BPJS", "Umum").tolist(),
+        tanggal,
+    ))
+
+    # 10 pertanyaan layanan (u/b sesuai layanan) + 3 keseluruhan per responden
+    skor = np.clip(np.rint(dasar[:, None] + rng.normal(0, 0.8, (n, 13))), 1, 5).astype(int)
+    id_u = np.array([kunci_id[f"u{i}"] for i in range(1, 11)] + [kunci_id[f"k{i}"] for i in range(1, 4)])
+    id_b = np.array([kunci_id[f"b{i}"] for i in range(1, 11)] + [kunci_id[f"k{i}"] for i in range(1, 4)])
+    pertanyaan = np.where(bpjs[:, None], id_b[None, :], id_u[None, :])
+    responden_id = np.repeat(ids, 13)
+    # label_id = skor (seed migrasi)
+    jawaban = list(zip(
+        responden_id.tolist(), pertanyaan.ravel().tolist(), skor.ravel().tolist(), skor.ravel().tolist()
+    ))
+
+    punya_saran = rng.random(n) < PROPORSI_SARAN
+    saran = list(zip(ids[punya_saran].tolist(), rng.choice(SARAN, int(punya_saran.sum())).tolist()))
+    return responden, jawaban, saran
+
+
+def isi_database(path, jumlah_responden, seed=42, hari=365):
+    """Buat/isi database di `path` dengan jumlah_responden responden sintetis."""
+    db = Database(path)
+    try:
+        jalankan_migrasi(db)
+        rng = np.random.default_rng(seed)
+        kunci_id = db.read(_kunci_ke_id)
+        mulai = (db.read(lambda conn: conn.execute("SELECT MAX(id) FROM responden").fetchone()[0]) or 0) + 1
+        tanggal_awal = datetime.datetime.now() - datetime.timedelta(days=hari)
+        sisa = jumlah_responden
+        while sisa > 0:
+            n = min(CHUNK, sisa)
+            responden, jawaban, saran = _chunk(rng, mulai, n, kunci_id, tanggal_awal, hari)
+
+            def _tulis(conn):
+                conn.executemany(
+                    "INSERT INTO responden (id, nama, jenis_kelamin, usia, layanan, tanggal) VALUES (?, ?, ?, ?, ?, ?)",
+                    responden,
+                )
+                conn.executemany(
+                    "INSERT INTO jawaban_data (responden_id, pertanyaan_id, label_id, jawaban_skor) VALUES (?, ?, ?, ?)",
+                    jawaban,
+                )
+                conn.executemany("INSERT INTO saran_masukan (responden_id, saran) VALUES (?, ?)", saran)
+
+            db.write(_tulis)
+            mulai += n
+            sisa -= n
+    finally:
+        db.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Isi database survei dengan data sintetis.")
+    parser.add_argument("path")
+    parser.add_argument("jumlah_responden", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    isi_database(args.path, args.jumlah_responden, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
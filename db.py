@@ -0,0 +1,669 @@
+"""Lapisan akses SQLite bersama untuk aplikasi survei klinik.
+
+Satu objek ``Database`` dipegang per proses: satu koneksi penulis (dijaga lock)
+dan sekumpulan kecil koneksi pembaca. Database dijalankan dalam mode WAL supaya
+pembaca (dashboard) tidak memblokir penulis (formulir) dan sebaliknya.
+"""
+import datetime
+import queue
+import random
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+BUSY_TIMEOUT_MS = 5000  # tunggu lock maksimal 5 detik sebelum "database is locked"
+MAX_RETRY = 5  # percobaan ulang bila tetap terkunci
+RETRY_BASE_DELAY = 0.05  # detik, digandakan tiap percobaan (backoff eksponensial)
+JUMLAH_PEMBACA = 4  # ukuran pool koneksi pembaca
+# FULL: setiap COMMIT di-fsync, jadi konfirmasi ke responden benar-benar tahan
+# mati listrik. Biayanya ditanggung bersama oleh group commit (PenulisBatch).
+SYNCHRONOUS_PENULIS = "FULL"
+
+
+def _is_locked(exc):
+    msg = str(exc).lower()
+    return "locked" in msg or "busy" in msg
+
+
+def with_retry(fn, *args, retries=MAX_RETRY, base_delay=RETRY_BASE_DELAY, **kwargs):
+    """Jalankan fn, ulangi dengan backoff + jitter bila database sedang terkunci."""
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if not _is_locked(e) or attempt == retries:
+                raise
+            time.sleep(base_delay * (2 ** attempt) * (1 + random.random()))
+
+
+# -------------------- TRACE --------------------
+class _KursorTerlacak(sqlite3.Cursor):
+    """Cursor yang menjumlahkan waktu di dalam execute & fetch saja.
+
+    Kerja Python di antara fetch (mis. menulis sheet ekspor) tidak ikut
+    terhitung. Statement dilaporkan saat hasilnya habis dibaca, cursor
+    dipakai untuk statement lain, ditutup, atau dibuang.
+    """
+
+    _jejak = None  # [sql, detik]
+
+    def _mulai(self, sql):
+        self._selesai()
+        self._jejak = [sql, 0.0]
+
+    def _selesai(self):
+        jejak, self._jejak = self._jejak, None
+        if jejak is not None:
+            self.connection.trace(*jejak)
+
+    def _ukur(self, fn, *args):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            if self._jejak is not None:
+                self._jejak[1] += time.perf_counter() - t0
+
+    def execute(self, sql, parameters=()):
+        self._mulai(sql)
+        self._ukur(super().execute, sql, parameters)
+        if self.description is None:
+            self._selesai()  # bukan SELECT: tidak ada baris untuk dibaca
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._mulai(sql)
+        self._ukur(super().executemany, sql, seq_of_parameters)
+        self._selesai()
+        return self
+
+    def fetchone(self):
+        row = self._ukur(super().fetchone)
+        if row is None:
+            self._selesai()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._ukur(super().fetchmany, size)
+        if len(rows) < size:
+            self._selesai()
+        return rows
+
+    def fetchall(self):
+        rows = self._ukur(super().fetchall)
+        self._selesai()
+        return rows
+
+    def __next__(self):
+        try:
+            return self._ukur(super().__next__)
+        except StopIteration:
+            self._selesai()
+            raise
+
+    def close(self):
+        self._selesai()
+        super().close()
+
+    def __del__(self):
+        self._selesai()
+
+
+class _KoneksiTerlacak(sqlite3.Connection):
+    """Koneksi yang semua cursor-nya _KursorTerlacak; trace(sql, durasi_detik)."""
+
+    trace = None
+
+    def cursor(self, factory=_KursorTerlacak):
+        return super().cursor(factory)
+
+    # Connection.execute bawaan tidak lewat Cursor.execute milik subclass
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def hubungkan(database, trace=None, **kwargs):
+    """sqlite3.connect; dengan trace, waktu execute + fetch tiap statement dilaporkan ke trace."""
+    if trace is None:
+        return sqlite3.connect(database, **kwargs)
+    conn = sqlite3.connect(database, factory=_KoneksiTerlacak, **kwargs)
+    conn.trace = trace
+    return conn
+
+
+class Database:
+    """Pool koneksi SQLite: satu penulis + beberapa pembaca, mode WAL."""
+
+    def __init__(self, path, readers=JUMLAH_PEMBACA, trace=None):
+        """trace: callable opsional (sql, durasi_detik) per statement, mis. Pelacak.catat_query."""
+        self.path = str(path)
+        self._trace = trace
+        self._max_readers = readers
+        self._jumlah_pembaca = 0
+        self._pool_lock = threading.Lock()
+        self._readers = queue.LifoQueue()
+        self._write_lock = threading.RLock()
+        self._writer = self._connect()
+
+    def _connect(self, read_only=False):
+        conn = hubungkan(
+            self.path,
+            trace=self._trace,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,  # transaksi diatur manual (BEGIN IMMEDIATE)
+            check_same_thread=False,  # Streamlit menjalankan sesi di thread berbeda
+        )
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        if not read_only:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS_PENULIS}")
+        else:
+            conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    # -------------------- PEMBACA --------------------
+    def _acquire_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if self._jumlah_pembaca < self._max_readers:
+                self._jumlah_pembaca += 1
+                return self._connect(read_only=True)
+        return self._readers.get()
+
+    @contextmanager
+    def reader(self):
+        """Pinjam koneksi pembaca dari pool."""
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def read(self, fn):
+        """Jalankan fn(conn) di koneksi pembaca, dengan retry."""
+        def attempt():
+            with self.reader() as conn:
+                return fn(conn)
+        return with_retry(attempt)
+
+    def snapshot(self, fn):
+        """Seperti read, tetapi fn(conn) berjalan dalam satu transaksi baca.
+
+        Semua query di fn melihat snapshot data yang sama, meski penulis
+        melakukan COMMIT di tengahnya.
+        """
+        def attempt():
+            with self.reader() as conn:
+                conn.execute("BEGIN")
+                try:
+                    return fn(conn)
+                finally:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")  # transaksi baca: tidak ada yang perlu disimpan
+        return with_retry(attempt)
+
+    # -------------------- PENULIS --------------------
+    @contextmanager
+    def transaction(self):
+        """Transaksi tulis eksklusif pada koneksi penulis."""
+        with self._write_lock:
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+    def write(self, fn):
+        """Jalankan fn(conn) dalam satu transaksi tulis, dengan retry."""
+        def attempt():
+            with self.transaction() as conn:
+                return fn(conn)
+        return with_retry(attempt)
+
+    def vacuum(self):
+        """VACUUM di koneksi penulis (tidak boleh di dalam transaksi)."""
+        with self._write_lock:
+            with_retry(self._writer.execute, "VACUUM")
+
+    def close(self):
+        with self._write_lock:
+            self._writer.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# -------------------- TULIS RESPONDEN --------------------
+def simpan_responden(conn, nama, jenis_kelamin, usia, layanan, jawaban_rows, saran, tanggal=None):
+    """Insert satu responden + jawaban (executemany) + saran, return id baru.
+
+    jawaban_rows: list (pertanyaan_key, jawaban_teks, jawaban_skor).
+    tanggal: 'YYYY-MM-DD HH:MM:SS' (mis. dari formulir kertas); None = sekarang.
+    Dipanggil di dalam transaksi yang sudah dibuka pemanggil.
+    """
+    c = conn.cursor()
+    if tanggal is None:
+        c.execute(
+            "INSERT INTO responden (nama, jenis_kelamin, usia, layanan) VALUES (?, ?, ?, ?)",
+            (nama, jenis_kelamin, usia, layanan),
+        )
+    else:
+        c.execute(
+            "INSERT INTO responden (nama, jenis_kelamin, usia, layanan, tanggal) VALUES (?, ?, ?, ?, ?)",
+            (nama, jenis_kelamin, usia, layanan, tanggal),
+        )
+    responden_id = c.lastrowid
+    # kunci/label baru (di luar seed migrasi) didaftarkan dulu ke tabel lookup
+    c.executemany(
+        "INSERT OR IGNORE INTO pertanyaan (kunci) VALUES (?)",
+        [(key,) for key in {key for key, _, _ in jawaban_rows}],
+    )
+    c.executemany(
+        "INSERT OR IGNORE INTO label_jawaban (teks) VALUES (?)",
+        [(teks,) for teks in {teks for _, teks, _ in jawaban_rows if teks}],
+    )
+    c.executemany(
+        "INSERT INTO jawaban_data (responden_id, pertanyaan_id, label_id, jawaban_skor) VALUES "
+        "(?, (SELECT id FROM pertanyaan WHERE kunci = ?), (SELECT id FROM label_jawaban WHERE teks = ?), ?)",
+        [(responden_id, key, teks, skor) for key, teks, skor in jawaban_rows],
+    )
+    if saran:
+        c.execute(
+            "INSERT INTO saran_masukan (responden_id, saran) VALUES (?, ?)",
+            (responden_id, saran),
+        )
+    return responden_id
+
+
+# -------------------- GROUP COMMIT --------------------
+BATCH_MAKS = 64  # kirim commit setelah N submission ...
+BATCH_TUNGGU_MS = 20  # ... atau setelah T milidetik sejak submission pertama
+
+
+class _Tiket:
+    """Satu submission yang menunggu batch-nya di-commit."""
+
+    def __init__(self, args):
+        self.args = args
+        self.selesai = threading.Event()
+        self.hasil = None
+        self.error = None
+
+
+class PenulisBatch:
+    """Antrian write-behind: thread latar menulis submission dalam group commit.
+
+    submit() memblokir sampai batch yang berisi submission tersebut sudah
+    COMMIT, jadi konfirmasi ke responden tetap berarti data sudah tersimpan.
+    """
+
+    def __init__(self, db, fn_tulis=simpan_responden, batch_maks=BATCH_MAKS, tunggu_ms=BATCH_TUNGGU_MS):
+        self.db = db
+        self.fn_tulis = fn_tulis
+        self.batch_maks = batch_maks
+        self.tunggu = tunggu_ms / 1000
+        self._antrian = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="penulis-batch", daemon=True)
+        self._thread.start()
+
+    def submit(self, *args, timeout=None):
+        """Antrikan satu submission, tunggu commit, return hasil fn_tulis."""
+        tiket = _Tiket(args)
+        self._antrian.put(tiket)
+        if not tiket.selesai.wait(timeout):
+            raise TimeoutError("Submission belum ter-commit dalam batas waktu.")
+        if tiket.error is not None:
+            raise tiket.error
+        return tiket.hasil
+
+    def _ambil_batch(self):
+        batch = [self._antrian.get()]
+        if batch[0] is None:
+            return None
+        batas = time.monotonic() + self.tunggu
+        while len(batch) < self.batch_maks:
+            sisa = batas - time.monotonic()
+            if sisa <= 0:
+                break
+            try:
+                tiket = self._antrian.get(timeout=sisa)
+            except queue.Empty:
+                break
+            if tiket is None:
+                self._antrian.put(None)  # proses batch ini dulu, baru berhenti
+                break
+            batch.append(tiket)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._ambil_batch()
+            if batch is None:
+                return
+            try:
+                hasil = self.db.write(lambda conn: [self.fn_tulis(conn, *t.args) for t in batch])
+                for tiket, h in zip(batch, hasil):
+                    tiket.hasil = h
+            except Exception:
+                # Satu submission rusak tidak boleh menggagalkan yang lain:
+                # ulangi satu per satu supaya error jatuh ke pemiliknya saja.
+                for tiket in batch:
+                    try:
+                        tiket.hasil = self.db.write(lambda conn: self.fn_tulis(conn, *tiket.args))
+                    except Exception as e:
+                        tiket.error = e
+            for tiket in batch:
+                tiket.selesai.set()
+
+    def close(self):
+        """Selesaikan antrian yang tersisa lalu hentikan thread."""
+        self._antrian.put(None)
+        self._thread.join()
+
+
+# -------------------- VERSI DATA --------------------
+# tabel yang versinya dipakai sebagai kunci cache (ekspor, seleksi kluster)
+TABEL_VERSI = ("responden", "jawaban", "saran_masukan")
+# `jawaban` adalah VIEW; versi dibaca dari tabel fisiknya
+TABEL_FISIK = {"jawaban": "jawaban_data"}
+
+
+def versi_data(conn):
+    """Versi murah per tabel: (MIN(id), MAX(id)), dibaca dari ujung indeks rowid.
+
+    Data hanya pernah ditambah, jadi MAX(id) naik tiap ada baris baru; MIN(id)
+    berubah bila baris lama dihapus sehingga cache harus dibangun ulang.
+    """
+    def _versi(tabel):
+        fisik = TABEL_FISIK.get(tabel, tabel)
+        # dua subquery terpisah: MIN dan MAX dalam satu SELECT memaksa full scan
+        return conn.execute(
+            f"SELECT (SELECT MIN(id) FROM {fisik}), (SELECT MAX(id) FROM {fisik})"
+        ).fetchone()
+
+    return {tabel: _versi(tabel) for tabel in TABEL_VERSI}
+
+
+# -------------------- FITUR CLUSTER --------------------
+def muat_skor_responden(conn, sejak_id=0):
+    """Rata-rata skor layanan & keseluruhan per responden dari skor_responden.
+
+    Hanya responden yang punya kedua jenis jawaban (sama seperti inner merge lama);
+    sejak_id membatasi ke responden_id > sejak_id (untuk update inkremental).
+    """
+    return pd.read_sql_query(
+        """
+        SELECT responden_id,
+               CAST(total_layanan AS REAL) / jumlah_layanan AS skor_layanan,
+               CAST(total_keseluruhan AS REAL) / jumlah_keseluruhan AS skor_keseluruhan
+        FROM skor_responden
+        WHERE jumlah_layanan > 0 AND jumlah_keseluruhan > 0 AND responden_id > ?
+        ORDER BY responden_id
+        """,
+        conn,
+        params=(sejak_id,),
+    )
+
+
+# -------------------- TABEL DASHBOARD (KEYSET PAGINATION) --------------------
+# nama -> (sumber, kolom penghubung ke responden.id, kolom yang boleh dipakai urut)
+TABEL_HALAMAN = {
+    "responden": ("responden", "id", ["id", "tanggal", "nama", "jenis_kelamin", "usia", "layanan"]),
+    "jawaban": ("jawaban", "responden_id", ["responden_id", "id", "pertanyaan_key", "jawaban_skor"]),
+    "saran_masukan": ("saran_masukan", "responden_id", ["responden_id", "id"]),
+    "responden_saran": ("responden_saran", "id", ["id", "tanggal", "nama", "jenis_kelamin", "usia", "layanan"]),
+}
+
+
+def _where_filter(filter_data, kolom_responden):
+    """Filter responden (tanggal, layanan, usia, jenis_kelamin) -> (sql, params).
+
+    filter_data: {"tanggal": (date_awal, date_akhir) | None, "layanan": [...], ...};
+    list kosong / None berarti tidak difilter.
+    """
+    kondisi, params = [], []
+    filter_data = filter_data or {}
+    rentang = filter_data.get("tanggal")
+    if rentang:
+        awal, akhir = rentang
+        kondisi.append("tanggal >= ? AND tanggal < ?")
+        params += [awal.isoformat(), (akhir + datetime.timedelta(days=1)).isoformat()]
+    for kolom in ("layanan", "usia", "jenis_kelamin"):
+        nilai = filter_data.get(kolom)
+        if nilai:
+            kondisi.append(f"{kolom} IN ({', '.join('?' * len(nilai))})")
+            params += list(nilai)
+    if not kondisi:
+        return "", []
+    sql = " AND ".join(kondisi)
+    if kolom_responden != "id":
+        # tabel anak: saring lewat id responden yang lolos filter
+        sql = f"{kolom_responden} IN (SELECT id FROM responden WHERE {sql})"
+    return sql, params
+
+
+def hitung_baris(conn, tabel, filter_data=None):
+    sumber, kolom_responden, _ = TABEL_HALAMAN[tabel]
+    where, params = _where_filter(filter_data, kolom_responden)
+    sql = f"SELECT COUNT(*) FROM {sumber}" + (f" WHERE {where}" if where else "")
+    return conn.execute(sql, params).fetchone()[0]
+
+
+def ambil_halaman(conn, tabel, filter_data=None, urut="id", menurun=True, kursor=None, ukuran=50):
+    """Satu halaman tabel dengan keyset pagination.
+
+    Urutan: `urut` (naik/turun) lalu id naik sebagai pemecah seri. kursor adalah
+    (nilai_urut, id) baris terakhir halaman sebelumnya. Return (DataFrame,
+    kursor halaman berikutnya atau None bila ini halaman terakhir).
+    """
+    sumber, kolom_responden, kolom_urut = TABEL_HALAMAN[tabel]
+    if urut not in kolom_urut:
+        raise ValueError(f"Kolom urut tidak dikenal untuk {tabel}: {urut}")
+    op = "<" if menurun else ">"
+    where, params = _where_filter(filter_data, kolom_responden)
+    kondisi = [where] if where else []
+    if kursor is not None:
+        nilai, id_akhir = kursor
+        if urut == "id":
+            kondisi.append(f"id {op} ?")
+            params.append(nilai)
+        else:
+            # bentuk "col <= ? AND (...)" supaya indeks bisa langsung seek ke posisi kursor
+            kondisi.append(f"{urut} {op}= ? AND ({urut} {op} ? OR id > ?)")
+            params += [nilai, nilai, id_akhir]
+    order = f"{urut} {'DESC' if menurun else 'ASC'}" + ("" if urut == "id" else ", id ASC")
+    sql = (
+        f"SELECT * FROM {sumber}"
+        + (f" WHERE {' AND '.join(kondisi)}" if kondisi else "")
+        + f" ORDER BY {order} LIMIT ?"
+    )
+    cur = conn.execute(sql, params + [ukuran + 1])
+    kolom = [d[0] for d in cur.description]
+    rows = cur.fetchall()
+    berikutnya = None
+    if len(rows) > ukuran:
+        rows = rows[:ukuran]
+        akhir = dict(zip(kolom, rows[-1]))
+        berikutnya = (akhir[urut], akhir["id"])
+    return pd.DataFrame(rows, columns=kolom), berikutnya
+
+
+# -------------------- PENCARIAN SARAN (FTS5) --------------------
+# penanda highlight; karakter kontrol supaya tidak bentrok dengan isi saran
+AWAL_SOROT, AKHIR_SOROT = "\x02", "\x03"
+
+
+def kueri_fts(teks):
+    """Teks bebas dari kotak pencarian -> ekspresi MATCH FTS5 yang aman.
+
+    Tiap kata dikutip (tanda baca/operator FTS tidak ditafsirkan) dan dicari
+    sebagai awalan; semua kata harus ada. Return None bila tidak ada kata.
+    """
+    kata = re.findall(r"\w+", teks or "")
+    if not kata:
+        return None
+    return " ".join(f'"{k}"*' for k in kata)
+
+
+def _sql_cari_saran(kolom, filter_data):
+    where, params = _where_filter(filter_data, "s.responden_id")
+    sql = (
+        f"SELECT {kolom} FROM saran_fts "
+        "JOIN saran_masukan s ON s.id = saran_fts.rowid "
+        "JOIN responden r ON r.id = s.responden_id "
+        "WHERE saran_fts MATCH ?" + (f" AND {where}" if where else "")
+    )
+    return sql, params
+
+
+def _punya_fts(conn):
+    # berkas arsip yang dibuat sebelum indeks FTS ada tidak bisa dicari
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'saran_fts'").fetchone() is not None
+
+
+def hitung_cari_saran(conn, kueri, filter_data=None):
+    if not _punya_fts(conn):
+        return 0
+    sql, params = _sql_cari_saran("COUNT(*)", filter_data)
+    return conn.execute(sql, [kueri] + params).fetchone()[0]
+
+
+# kolom hasil pencarian -> ekspresi SQL
+KOLOM_CARI_SARAN = {
+    "id": "s.id",
+    "responden_id": "s.responden_id",
+    "tanggal": "r.tanggal",
+    "layanan": "r.layanan",
+    "nama": "r.nama",
+    "cuplikan": f"snippet(saran_fts, 0, '{AWAL_SOROT}', '{AKHIR_SOROT}', '…', 40)",
+    "skor": "bm25(saran_fts)",
+}
+
+
+def cari_saran(conn, kueri, filter_data=None, batas=20, offset=0):
+    """Saran yang cocok dengan kueri (hasil kueri_fts), urut relevansi (bm25).
+
+    Kolom `cuplikan` berisi potongan teks dengan kata yang cocok diapit
+    AWAL_SOROT/AKHIR_SOROT; `skor` makin kecil makin relevan.
+    """
+    if not _punya_fts(conn):
+        return pd.DataFrame(columns=list(KOLOM_CARI_SARAN))
+    sql, params = _sql_cari_saran(
+        ", ".join(f"{expr} AS {nama}" for nama, expr in KOLOM_CARI_SARAN.items()), filter_data
+    )
+    return pd.read_sql_query(
+        sql + " ORDER BY skor, id LIMIT ? OFFSET ?", conn, params=[kueri] + params + [batas, offset]
+    )
+
+
+# -------------------- TREN (ROLLUP HARIAN) --------------------
+# periode -> ekspresi tanggal awal periode dari kolom hari (YYYY-MM-DD)
+PERIODE_TREN = {
+    "Harian": "hari",
+    "Mingguan": "date(hari, '-6 days', 'weekday 1')",  # Senin
+    "Bulanan": "strftime('%Y-%m-01', hari)",
+}
+
+
+def _filter_rollup(filter_data):
+    """Filter dashboard yang bisa diterapkan ke rollup (tanggal & layanan)."""
+    kondisi, params = [], []
+    filter_data = filter_data or {}
+    rentang = filter_data.get("tanggal")
+    if rentang:
+        kondisi.append("hari BETWEEN ? AND ?")
+        params += [rentang[0].isoformat(), rentang[1].isoformat()]
+    if filter_data.get("layanan"):
+        kondisi.append(f"layanan IN ({', '.join('?' * len(filter_data['layanan']))})")
+        params += list(filter_data["layanan"])
+    return kondisi, params
+
+
+def muat_tren_skor(conn, periode="Mingguan", kunci=None, filter_data=None):
+    """Jumlah jawaban, rata-rata & simpangan baku skor per (periode, layanan).
+
+    kunci: daftar kunci pertanyaan yang diikutkan (None = semua). Dibaca dari
+    rollup_skor_harian saja, tidak menyentuh jawaban_data.
+    """
+    kondisi, params = _filter_rollup(filter_data)
+    if kunci is not None:
+        kondisi.append(
+            f"pertanyaan_id IN (SELECT id FROM pertanyaan WHERE kunci IN ({', '.join('?' * len(kunci))}))"
+        )
+        params += list(kunci)
+    df = pd.read_sql_query(
+        f"""
+        SELECT {PERIODE_TREN[periode]} AS periode, layanan,
+               SUM(jumlah) AS jumlah, SUM(jumlah * skor) AS total, SUM(jumlah * skor * skor) AS total_kuadrat
+        FROM rollup_skor_harian
+        WHERE jumlah > 0{''.join(' AND ' + k for k in kondisi)}
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        """,
+        conn,
+        params=params,
+    )
+    n = df["jumlah"]
+    df["rata_rata"] = df["total"] / n
+    # simpangan baku sampel dari jumlah, total & total kuadrat
+    varians = (df["total_kuadrat"] - n * df["rata_rata"] ** 2) / (n - 1)
+    df["simpangan_baku"] = varians.clip(lower=0).where(n > 1) ** 0.5
+    df["periode"] = pd.to_datetime(df["periode"])
+    return df.drop(columns=["total", "total_kuadrat"])
+
+
+def muat_tren_sentimen(conn, periode="Mingguan", filter_data=None):
+    """Jumlah & persentase responden Positif/Netral/Negatif per (periode, layanan)."""
+    kondisi, params = _filter_rollup(filter_data)
+    df = pd.read_sql_query(
+        f"""
+        SELECT {PERIODE_TREN[periode]} AS periode, layanan, sentimen, SUM(jumlah) AS jumlah
+        FROM rollup_sentimen_harian
+        WHERE jumlah > 0{''.join(' AND ' + k for k in kondisi)}
+        GROUP BY 1, 2, 3
+        ORDER BY 1, 2, 3
+        """,
+        conn,
+        params=params,
+    )
+    df["persen"] = 100 * df["jumlah"] / df.groupby(["periode", "layanan"])["jumlah"].transform("sum")
+    df["periode"] = pd.to_datetime(df["periode"])
+    return df
+
+
+def muat_distribusi_skor(conn, filter_data=None):
+    """Jumlah jawaban per (layanan, kunci pertanyaan, skor 1-5) dari rollup_skor_harian."""
+    kondisi, params = _filter_rollup(filter_data)
+    return pd.read_sql_query(
+        f"""
+        SELECT s.layanan, p.kunci, s.skor, SUM(s.jumlah) AS jumlah
+        FROM rollup_skor_harian s
+        JOIN pertanyaan p ON p.id = s.pertanyaan_id
+        WHERE s.jumlah > 0 AND s.skor BETWEEN 1 AND 5{''.join(' AND ' + k for k in kondisi)}
+        GROUP BY 1, 2, 3
+        ORDER BY 1, 2, 3
+        """,
+        conn,
+        params=params,
+    )
+
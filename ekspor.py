@@ -0,0 +1,272 @@
+"""Ekspor data survei ke Excel / CSV (zip) / Parquet secara streaming.
+
+Data dibaca dari SQLite per chunk (fetchmany) dan langsung ditulis ke file
+tujuan, jadi memori puncak ditentukan UKURAN_CHUNK, bukan jumlah baris.
+Sumber data adalah daftar koneksi: partisi live lalu berkas arsip bulanan
+(arsip.Arsip.koneksi); tiap sheet/file berisi baris dari semua partisi.
+"""
+import csv
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from db import versi_data
+
+UKURAN_CHUNK = 5000
+BATAS_BARIS_EXCEL = 1_048_575  # batas baris per sheet xlsx, dikurangi header
+
+# nama sheet/file -> (query, [(kolom, tipe)]); tipe dipakai untuk skema Parquet
+DATA_EKSPOR = {
+    "Responden": (
+        "SELECT id, nama, jenis_kelamin, usia, layanan, tanggal FROM responden ORDER BY id DESC",
+        [("id", "int"), ("nama", "str"), ("jenis_kelamin", "str"), ("usia", "str"),
+         ("layanan", "str"), ("tanggal", "str")],
+    ),
+    "Detail Jawaban": (
+        "SELECT id, responden_id, pertanyaan_key, jawaban_teks, jawaban_skor "
+        "FROM jawaban ORDER BY responden_id DESC, id ASC",
+        [("id", "int"), ("responden_id", "int"), ("pertanyaan_key", "str"),
+         ("jawaban_teks", "str"), ("jawaban_skor", "int")],
+    ),
+    "Saran Masukan": (
+        "SELECT id, responden_id, saran FROM saran_masukan ORDER BY responden_id DESC",
+        [("id", "int"), ("responden_id", "int"), ("saran", "str")],
+    ),
+    "Data Gabungan": (
+        "SELECT id, nama, jenis_kelamin, usia, layanan, tanggal, responden_id, saran "
+        "FROM responden_saran ORDER BY id DESC",
+        [("id", "int"), ("nama", "str"), ("jenis_kelamin", "str"), ("usia", "str"),
+         ("layanan", "str"), ("tanggal", "str"), ("responden_id", "int"), ("saran", "str")],
+    ),
+    "Analisis Kluster": (
+        "SELECT s.responden_id, "
+        "CAST(s.total_layanan AS REAL) / s.jumlah_layanan AS skor_layanan, "
+        "CAST(s.total_keseluruhan AS REAL) / s.jumlah_keseluruhan AS skor_keseluruhan, "
+        "k.cluster, k.sentimen "
+        "FROM kluster_responden k JOIN skor_responden s ON s.responden_id = k.responden_id "
+        "WHERE s.jumlah_layanan > 0 AND s.jumlah_keseluruhan > 0 "
+        "ORDER BY s.responden_id",
+        [("responden_id", "int"), ("skor_layanan", "float"), ("skor_keseluruhan", "float"),
+         ("cluster", "int"), ("sentimen", "str")],
+    ),
+}
+
+# format -> (ekstensi, mime)
+FORMAT_EKSPOR = {
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV (zip)": ("zip", "application/zip"),
+    "Parquet (zip)": ("zip", "application/zip"),
+}
+
+
+def _chunks(sumber, sql):
+    """Yield list baris per UKURAN_CHUNK dari tiap koneksi di `sumber`, berurutan."""
+    for conn in sumber:
+        cur = conn.execute(sql)
+        while True:
+            rows = cur.fetchmany(UKURAN_CHUNK)
+            if not rows:
+                break
+            yield rows
+
+
+@contextmanager
+def _sumber(conn, arsip):
+    """[conn] + koneksi berkas arsip yang tercatat di snapshot conn."""
+    if arsip is None:
+        yield [conn]
+    else:
+        with arsip.koneksi(conn) as sumber:
+            yield sumber
+
+
+def _tanpa_progress(selesai, total, nama):
+    pass
+
+
+def ekspor_excel(sumber, tujuan, progress=_tanpa_progress):
+    """Tulis semua data ke xlsx dengan workbook write-only openpyxl."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for i, (nama_sheet, (sql, kolom)) in enumerate(DATA_EKSPOR.items()):
+        progress(i, len(DATA_EKSPOR), nama_sheet)
+        ws, bagian, baris = None, 1, 0
+        for rows in _chunks(sumber, sql):
+            for row in rows:
+                if ws is None or baris >= BATAS_BARIS_EXCEL:
+                    # sheet penuh -> lanjut ke "Nama (2)", "Nama (3)", ...
+                    judul = nama_sheet if ws is None else f"{nama_sheet} ({bagian})"
+                    ws = wb.create_sheet(judul[:31])
+                    ws.append([k for k, _ in kolom])
+                    bagian, baris = bagian + 1, 0
+                ws.append(row)
+                baris += 1
+    if not wb.worksheets:
+        wb.create_sheet("Responden").append([k for k, _ in DATA_EKSPOR["Responden"][1]])
+    wb.save(tujuan)
+
+
+def ekspor_csv_zip(sumber, tujuan, progress=_tanpa_progress):
+    """Satu CSV per tabel di dalam satu zip (deflate)."""
+    with zipfile.ZipFile(tujuan, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for i, (nama, (sql, kolom)) in enumerate(DATA_EKSPOR.items()):
+            progress(i, len(DATA_EKSPOR), nama)
+            with zf.open(f"{nama}.csv", "w") as raw:
+                # utf-8-sig supaya emoji/label terbaca benar saat dibuka di Excel
+                teks = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+                writer = csv.writer(teks)
+                writer.writerow([k for k, _ in kolom])
+                for rows in _chunks(sumber, sql):
+                    writer.writerows(rows)
+                teks.flush()
+                teks.detach()
+
+
+def ekspor_parquet_zip(sumber, tujuan, progress=_tanpa_progress):
+    """Satu file Parquet per tabel (row group per chunk) di dalam satu zip."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Ekspor Parquet membutuhkan paket 'pyarrow'.") from None
+
+    tipe_arrow = {"int": pa.int64(), "float": pa.float64(), "str": pa.string()}
+    with tempfile.TemporaryDirectory() as tmp, \
+            zipfile.ZipFile(tujuan, "w", compression=zipfile.ZIP_STORED) as zf:
+        for i, (nama, (sql, kolom)) in enumerate(DATA_EKSPOR.items()):
+            progress(i, len(DATA_EKSPOR), nama)
+            schema = pa.schema([(k, tipe_arrow[t]) for k, t in kolom])
+            path = Path(tmp) / f"{nama}.parquet"
+            with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+                for rows in _chunks(sumber, sql):
+                    kolom_data = list(zip(*rows))
+                    writer.write_table(pa.Table.from_arrays(
+                        [pa.array(v, type=f.type) for v, f in zip(kolom_data, schema)],
+                        schema=schema,
+                    ))
+            zf.write(path, path.name)
+            path.unlink()
+
+
+_PENULIS = {
+    "Excel": ekspor_excel,
+    "CSV (zip)": ekspor_csv_zip,
+    "Parquet (zip)": ekspor_parquet_zip,
+}
+
+
+def ekspor(db, format_ekspor, tujuan, progress=_tanpa_progress, arsip=None):
+    """Ekspor semua data ke file `tujuan` dalam format_ekspor (kunci FORMAT_EKSPOR)."""
+    def _tulis(conn):
+        with _sumber(conn, arsip) as sumber:
+            _PENULIS[format_ekspor](sumber, str(tujuan), progress)
+    db.snapshot(_tulis)  # satu transaksi baca supaya semua sheet konsisten
+    return tujuan
+
+
+# -------------------- CACHE FILE EKSPOR --------------------
+def direktori_ekspor(path_db):
+    """Direktori cache ekspor milik database path_db: <stem>_cache_ekspor/ di sebelahnya."""
+    path_db = Path(path_db)
+    return path_db.with_name(f"{path_db.stem}_cache_ekspor")
+
+
+def versi_ekspor(conn):
+    """Versi data yang memengaruhi isi file ekspor (termasuk model kluster).
+
+    Data hanya ditambah (penghapusan lewat pengarsipan mengubah daftar arsip),
+    jadi identitas database + rentang id cukup untuk membedakan isinya.
+    """
+    versi = versi_data(conn)
+    versi["identitas"] = conn.execute("SELECT uuid FROM identitas_db").fetchone()
+    versi["model_kluster"] = conn.execute("SELECT MAX(id) FROM model_kluster").fetchone()
+    versi["arsip"] = conn.execute(
+        "SELECT group_concat(berkas) FROM (SELECT berkas FROM arsip_bulan ORDER BY bulan)"
+    ).fetchone()
+    return versi
+
+
+class CacheEkspor:
+    """File ekspor di disk, dikunci per (format, versi data).
+
+    File dibuat hanya bila diminta; unduhan berikutnya atas data yang sama
+    memakai file yang sudah ada. File lama dibuang berdasarkan umur dan total ukuran.
+    """
+
+    def __init__(self, direktori, maks_bytes=500 * 1024 ** 2, maks_umur_detik=24 * 3600, arsip=None):
+        self.direktori = Path(direktori)
+        self.arsip = arsip
+        self.maks_bytes = maks_bytes
+        self.maks_umur = maks_umur_detik
+        self._lock = threading.Lock()
+
+    def _path(self, format_ekspor, versi):
+        ext = FORMAT_EKSPOR[format_ekspor][0]
+        kunci = hashlib.sha1(repr((format_ekspor, sorted(versi.items()))).encode()).hexdigest()[:16]
+        slug = format_ekspor.split()[0].lower()
+        return self.direktori / f"{slug}_{kunci}.{ext}"
+
+    def cari(self, db, format_ekspor):
+        """Path file siap unduh untuk data saat ini, atau None bila belum dibuat."""
+        path = self._path(format_ekspor, db.snapshot(versi_ekspor))
+        if not path.exists():
+            return None
+        os.utime(path)  # tandai baru dipakai (untuk eviksi LRU)
+        return path
+
+    def buat(self, db, format_ekspor, progress=_tanpa_progress):
+        """Bangun file ekspor (satu snapshot baca) lalu simpan ke cache."""
+        self.direktori.mkdir(parents=True, exist_ok=True)
+        ext = FORMAT_EKSPOR[format_ekspor][0]
+        fd, tmp = tempfile.mkstemp(dir=self.direktori, suffix=f".{ext}.tmp")
+        os.close(fd)
+        try:
+            def _bangun(conn):
+                # versi dibaca di snapshot yang sama dengan datanya
+                versi = versi_ekspor(conn)
+                with _sumber(conn, self.arsip) as sumber:
+                    _PENULIS[format_ekspor](sumber, tmp, progress)
+                return versi
+            versi = db.snapshot(_bangun)
+            path = self._path(format_ekspor, versi)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        progress(len(DATA_EKSPOR), len(DATA_EKSPOR), "")
+        self.bersihkan(simpan=path)
+        return path
+
+    def bersihkan(self, simpan=None):
+        """Hapus file yang kedaluwarsa, lalu yang paling lama tidak dipakai bila kebesaran."""
+        with self._lock:
+            if not self.direktori.exists():
+                return
+            sekarang = time.time()
+            files = []
+            for path in self.direktori.iterdir():
+                if path.suffix == ".tmp" or path == simpan:
+                    continue
+                try:
+                    info = path.stat()
+                except FileNotFoundError:
+                    continue
+                if sekarang - info.st_mtime > self.maks_umur:
+                    path.unlink(missing_ok=True)
+                else:
+                    files.append((info.st_mtime, info.st_size, path))
+            total = sum(size for _, size, _ in files)
+            if simpan is not None and simpan.exists():
+                total += simpan.stat().st_size
+            for _, size, path in sorted(files):
+                if total <= self.maks_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
@@ -0,0 +1,71 @@
+"""Definisi formulir survei yang dipakai bersama oleh app.py dan impor.py.
+
+Pilihan data diri, skala jawaban, kunci pertanyaan per layanan dan aturan
+validasi submit ada di sini supaya formulir Streamlit dan impor batch
+offline menolak/menerima data yang sama persis.
+"""
+
+# -------------------- PILIHAN DATA DIRI ----------------------
+PILIHAN_USIA = ["Dibawah 20 tahun", "21–30 tahun", "31–40 tahun", "41–50 tahun", "Diatas 50 tahun"]
+PILIHAN_JENIS_KELAMIN = ["Laki-laki", "Perempuan"]
+PILIHAN_LAYANAN = ["Umum", "BPJS"]
+
+# -------------------- PERTANYAAN ----------------------
+SKALA_JAWABAN = [
+    "1 😠 Sangat Tidak Puas",
+    "2 😟 Tidak Puas",
+    "3 😐 Netral",
+    "4 🙂 Puas",
+    "5 😄 Sangat Puas",
+]
+
+# layanan -> kunci pertanyaan bagian B (wajib diisi semua)
+KUNCI_LAYANAN = {
+    "Umum": [f"u{i}" for i in range(1, 11)],
+    "BPJS": [f"b{i}" for i in range(1, 11)],
+}
+# bagian C, sama untuk semua layanan
+KUNCI_KESELURUHAN = ["k1", "k2", "k3"]
+# aspek yang ditanyakan di kedua layanan: (label, kunci Umum, kunci BPJS)
+PASANGAN_LAYANAN = [
+    ("Pelayanan dokter", "u2", "b3"),
+    ("Waktu tunggu", "u3", "b4"),
+    ("Pendaftaran", "u4", "b1"),
+    ("Informasi petugas", "u5", "b2"),
+    ("Obat & administrasi", "u6", "b5"),
+    ("Fasilitas bersih & nyaman", "u7", "b8"),
+    ("Kepuasan layanan", "u9", "b9"),
+    ("Datang kembali & rekomendasi", "u10", "b10"),
+]
+
+
+def extract_data_from_radio(radio_val):
+    """return (teks, skor) dari string radio '1 😠 Sangat Tidak Puas'"""
+    if radio_val is None:
+        return None, 0
+    parts = radio_val.split()
+    skor = int(parts[0])
+    teks = " ".join(parts[1:])
+    return teks, skor
+
+
+def validasi(nama, jenis_kelamin, usia, layanan, jawaban_dict):
+    """Aturan submit formulir. Return list pesan kesalahan (kosong = valid)."""
+    kesalahan = []
+    if not nama:
+        kesalahan.append("nama kosong")
+    if usia not in PILIHAN_USIA:
+        kesalahan.append(f"usia tidak dikenal: {usia!r}")
+    if jenis_kelamin not in PILIHAN_JENIS_KELAMIN:
+        kesalahan.append(f"jenis kelamin tidak dikenal: {jenis_kelamin!r}")
+    if layanan not in KUNCI_LAYANAN:
+        kesalahan.append(f"layanan tidak dikenal: {layanan!r}")
+        return kesalahan
+    kosong = [k for k in KUNCI_LAYANAN[layanan] if jawaban_dict.get(k) is None]
+    if kosong:
+        kesalahan.append("pertanyaan layanan belum diisi: " + ", ".join(kosong))
+    sah = set(KUNCI_LAYANAN[layanan]) | set(KUNCI_KESELURUHAN)
+    asing = [k for k in jawaban_dict if k not in sah]
+    if asing:
+        kesalahan.append(f"pertanyaan bukan untuk layanan {layanan}: " + ", ".join(asing))
+    return kesalahan
@@ -0,0 +1,256 @@
+"""Impor batch responden (formulir kertas / kiosk) dari CSV atau JSONL.
+
+Tiap baris berbentuk sama dengan jawaban_dict formulir: kolom data diri
+(nama, jenis_kelamin, usia, layanan, saran, tanggal opsional) plus satu kolom
+per kunci pertanyaan (u1..u10 / b1..b10, k1..k3) berisi label radio
+("4 🙂 Puas"), label tanpa angka ("🙂 Puas") atau skornya saja (4).
+Baris JSONL boleh menaruh jawaban di objek "jawaban"; kolom lain diabaikan.
+
+Baris divalidasi dengan aturan submit formulir (formulir.validasi), duplikat
+dibuang (di dalam batch maupun terhadap impor sebelumnya lewat tabel
+impor_responden), lalu ditulis UKURAN_TRANSAKSI responden per transaksi.
+
+    python impor.py batch_poli_anak.csv kiosk_2024-05.jsonl
+    python impor.py batch.csv --cek     # validasi saja, tanpa menulis (DB harus sudah dimigrasi)
+"""
+import argparse
+import csv
+import datetime
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+from db import Database, simpan_responden
+from formulir import SKALA_JAWABAN, extract_data_from_radio, validasi
+from migrasi import MIGRASI, jalankan_migrasi, versi_skema
+
+BASE_DIR = Path(__file__).resolve().parent
+UKURAN_TRANSAKSI = 2000  # responden per transaksi tulis
+
+_KUNCI_PERTANYAAN = re.compile(r"^[ubk]\d+$")
+_FORMAT_TANGGAL = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%d/%m/%Y %H:%M", "%d/%m/%Y"]
+# skor, "1 😠 Sangat Tidak Puas" dan "😠 Sangat Tidak Puas" -> label radio
+_LABEL = {}
+for _label in SKALA_JAWABAN:
+    _teks, _skor = extract_data_from_radio(_label)
+    _LABEL.update({str(_skor): _label, _label: _label, _teks: _label})
+
+
+# -------------------- BACA BERKAS --------------------
+def _baca_csv(path):
+    # utf-8-sig: CSV hasil "Save As" Excel diawali BOM
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for nomor, baris in enumerate(csv.DictReader(f), start=2):
+            yield f"{path.name}:{nomor}", baris
+
+
+def _baca_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for nomor, baris in enumerate(f, start=1):
+            if not baris.strip():
+                continue
+            try:
+                data = json.loads(baris)
+            except json.JSONDecodeError as e:
+                data = ValueError(f"JSON tidak valid: {e}")
+            else:
+                if not isinstance(data, dict):
+                    data = ValueError("baris JSONL harus berupa objek")
+            yield f"{path.name}:{nomor}", data
+
+
+_PEMBACA = {".csv": _baca_csv, ".jsonl": _baca_jsonl, ".ndjson": _baca_jsonl}
+
+
+def baca_berkas(path):
+    """Yield (lokasi, record) per baris; record berupa dict atau ValueError."""
+    path = Path(path)
+    pembaca = _PEMBACA.get(path.suffix.lower())
+    if pembaca is None:
+        raise ValueError(f"Format berkas tidak didukung: {path.name} (pakai .csv atau .jsonl)")
+    return pembaca(path)
+
+
+# -------------------- NORMALISASI --------------------
+def _teks(nilai):
+    if nilai is None:
+        return ""
+    return " ".join(str(nilai).split())
+
+
+def _label_jawaban(kunci, nilai):
+    """Nilai sel jawaban -> label radio, atau None bila kosong."""
+    if isinstance(nilai, float) and nilai.is_integer():
+        nilai = int(nilai)
+    teks = _teks(nilai)
+    if not teks:
+        return None
+    label = _LABEL.get(teks)
+    if label is None:
+        raise ValueError(f"jawaban {kunci} tidak dikenal: {nilai!r}")
+    return label
+
+
+def _tanggal(nilai):
+    teks = _teks(nilai)
+    if not teks:
+        return None
+    for fmt in _FORMAT_TANGGAL:
+        try:
+            return datetime.datetime.strptime(teks, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            pass
+    raise ValueError(f"tanggal tidak dikenal: {nilai!r}")
+
+
+def normalisasi(record):
+    """Satu record mentah -> (sidik, argumen simpan_responden). ValueError bila tidak valid."""
+    jawaban = record.get("jawaban")
+    if not isinstance(jawaban, dict):
+        jawaban = {k: v for k, v in record.items() if k and _KUNCI_PERTANYAAN.match(k)}
+    jawaban_dict = {}
+    for kunci, nilai in jawaban.items():
+        label = _label_jawaban(kunci, nilai)
+        if label is not None:
+            jawaban_dict[kunci] = label
+
+    nama = _teks(record.get("nama"))
+    jenis_kelamin = _teks(record.get("jenis_kelamin"))
+    usia = _teks(record.get("usia"))
+    layanan = _teks(record.get("layanan"))
+    kesalahan = validasi(nama, jenis_kelamin, usia, layanan, jawaban_dict)
+    if kesalahan:
+        raise ValueError("; ".join(kesalahan))
+
+    saran = str(record.get("saran") or "").strip()
+    tanggal = _tanggal(record.get("tanggal"))
+    jawaban_rows = sorted((key, *extract_data_from_radio(val)) for key, val in jawaban_dict.items())
+    sidik = hashlib.sha1(json.dumps(
+        [nama, jenis_kelamin, usia, layanan, tanggal, jawaban_rows, saran], ensure_ascii=False
+    ).encode("utf-8")).hexdigest()
+    return sidik, (nama, jenis_kelamin, usia, layanan, jawaban_rows, saran, tanggal)
+
+
+# -------------------- TULIS --------------------
+def _sudah_diimpor(conn, daftar_sidik):
+    ada = set()
+    daftar_sidik = list(daftar_sidik)
+    for i in range(0, len(daftar_sidik), 500):
+        bagian = daftar_sidik[i:i + 500]
+        ada.update(r[0] for r in conn.execute(
+            f"SELECT sidik FROM impor_responden WHERE sidik IN ({','.join('?' * len(bagian))})", bagian
+        ))
+    return ada
+
+
+def _tulis_batch(batch):
+    def _tulis(conn):
+        # dicek ulang di dalam transaksi tulis: impor lain mungkin berjalan bersamaan
+        ada = _sudah_diimpor(conn, (sidik for sidik, _, _ in batch))
+        baru = 0
+        for sidik, args, berkas in batch:
+            if sidik in ada:
+                continue
+            responden_id = simpan_responden(conn, *args)
+            conn.execute(
+                "INSERT INTO impor_responden (sidik, responden_id, berkas) VALUES (?, ?, ?)",
+                (sidik, responden_id, berkas),
+            )
+            baru += 1
+        return baru
+    return _tulis
+
+
+def impor(db, berkas, ukuran_transaksi=UKURAN_TRANSAKSI, cek=False):
+    """Impor semua baris dari daftar berkas ke db. Return ringkasan (dict).
+
+    cek=True hanya memvalidasi dan menghitung duplikat, tanpa menulis.
+    """
+    hasil = {"dibaca": 0, "disimpan": 0, "duplikat": 0, "ditolak": []}
+    terlihat = set()
+    batch = []
+
+    def kirim():
+        if cek:
+            baru = len(batch) - len(db.read(lambda conn: _sudah_diimpor(conn, (s for s, _, _ in batch))))
+        else:
+            baru = db.write(_tulis_batch(batch))
+        hasil["disimpan"] += baru
+        hasil["duplikat"] += len(batch) - baru
+        batch.clear()
+
+    for path in berkas:
+        for lokasi, record in baca_berkas(path):
+            hasil["dibaca"] += 1
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                sidik, args = normalisasi(record)
+            except ValueError as e:
+                hasil["ditolak"].append((lokasi, str(e)))
+                continue
+            if sidik in terlihat:
+                hasil["duplikat"] += 1
+                continue
+            terlihat.add(sidik)
+            batch.append((sidik, args, Path(path).name))
+            if len(batch) >= ukuran_transaksi:
+                kirim()
+    if batch:
+        kirim()
+    return hasil
+
+
+def _versi_skema_berkas(path):
+    """PRAGMA user_version berkas database, dibuka read-only (berkas tidak dibuat/diubah)."""
+    conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return versi_skema(conn)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Impor batch responden survei dari CSV/JSONL.")
+    parser.add_argument("berkas", nargs="+", help="berkas .csv / .jsonl")
+    parser.add_argument("--db", default=os.environ.get("SURVEI_DB_PATH", BASE_DIR / "survei_klinik.db"))
+    parser.add_argument("--ukuran-transaksi", type=int, default=UKURAN_TRANSAKSI)
+    parser.add_argument("--cek", action="store_true", help="validasi saja, tanpa menulis ke database")
+    args = parser.parse_args()
+
+    if args.cek:
+        # --cek tidak boleh menulis: migrasi (dan VACUUM) hanya dijalankan oleh impor biasa
+        try:
+            versi = _versi_skema_berkas(args.db)
+        except sqlite3.Error as e:
+            parser.error(f"tidak bisa membuka {args.db}: {e}")
+        if versi < MIGRASI[-1][0]:
+            parser.error(
+                f"skema {args.db} versi {versi}, perlu {MIGRASI[-1][0]}; "
+                "jalankan impor tanpa --cek atau buka aplikasi sekali untuk migrasi"
+            )
+
+    db = Database(args.db)
+    try:
+        if not args.cek:
+            jalankan_migrasi(db)
+        hasil = impor(db, args.berkas, ukuran_transaksi=args.ukuran_transaksi, cek=args.cek)
+    finally:
+        db.close()
+
+    for lokasi, pesan in hasil["ditolak"]:
+        print(f"{lokasi}: {pesan}", file=sys.stderr)
+    print(
+        f"{hasil['dibaca']} baris dibaca, "
+        f"{hasil['disimpan']} {'siap disimpan' if args.cek else 'disimpan'}, "
+        f"{hasil['duplikat']} duplikat, {len(hasil['ditolak'])} ditolak"
+    )
+    return 1 if hasil["ditolak"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
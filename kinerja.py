@@ -0,0 +1,135 @@
+"""Instrumentasi waktu per rerun dan log query lambat.
+
+Pelacak menyimpan rincian beberapa rerun terakhir (rentang waktu per langkah,
+jumlah & total waktu query) dan statistik query SQLite, lalu menulis ringkasan
+ke logger "survei.kinerja" sebagai JSON satu baris (pasang_log menambahkan
+handler stderr; level lewat env SURVEI_LOG_KINERJA, default INFO).
+
+Waktu query diukur oleh koneksi terlacak di db.py: hanya waktu di dalam
+execute & fetch yang dijumlahkan, jadi kerja Python di antara fetch tidak
+ikut terhitung sebagai waktu SQL.
+"""
+import collections
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("survei.kinerja")
+
+AMBANG_LAMBAT_MS = 100  # query di atas ini ditulis ke log sebagai WARNING
+JUMLAH_RERUN = 20  # rerun terakhir yang disimpan
+MAKS_POLA_QUERY = 500  # batas jumlah pola query yang diagregasi
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPASI = re.compile(r"\s+")
+
+_rerun_aktif = contextvars.ContextVar("rerun_aktif", default=None)
+
+
+def pasang_log(level=None):
+    """Pasang handler stderr pada logger "survei.kinerja" (sekali; aman dipanggil ulang)."""
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False  # jangan tercetak dua kali bila root logger juga punya handler
+    logger.setLevel(level or os.environ.get("SURVEI_LOG_KINERJA", "INFO").upper())
+    return logger
+
+
+def pola_query(sql):
+    """Normalisasi SQL (literal -> ?) supaya query sejenis teragregasi."""
+    return _SPASI.sub(" ", _LITERAL.sub("?", sql)).strip()
+
+
+class Pelacak:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rerun = collections.deque(maxlen=JUMLAH_RERUN)
+        self.query = {}  # pola -> {"jumlah", "total_ms", "maks_ms", "terakhir"}
+
+    # -------------------- RERUN --------------------
+    def mulai_rerun(self, halaman):
+        sebelumnya = _rerun_aktif.get()
+        if sebelumnya is not None and "total_ms" not in sebelumnya:
+            # rerun sebelumnya terputus (st.rerun / st.stop) sebelum selesai_rerun
+            self._tutup(sebelumnya, terputus=True)
+        _rerun_aktif.set({
+            "mulai": time.time(),
+            "_t0": time.perf_counter(),
+            "halaman": halaman,
+            "rentang": {},
+            "jumlah_query": 0,
+            "query_ms": 0.0,
+        })
+
+    def tandai_halaman(self, halaman):
+        """Ganti halaman rerun saat ini (navigasi sidebar baru diketahui setelah mulai_rerun)."""
+        rerun = _rerun_aktif.get()
+        if rerun is not None:
+            rerun["halaman"] = halaman
+
+    def selesai_rerun(self):
+        rerun = _rerun_aktif.get()
+        if rerun is not None and "total_ms" not in rerun:
+            self._tutup(rerun)
+
+    def _tutup(self, rerun, terputus=False):
+        rerun["total_ms"] = (time.perf_counter() - rerun.pop("_t0")) * 1000
+        rerun["terputus"] = terputus
+        with self._lock:
+            self.rerun.append(rerun)
+        logger.info(json.dumps({"jenis": "rerun", **rerun}))
+
+    @contextmanager
+    def rentang(self, nama):
+        """Ukur satu langkah di rerun saat ini (mis. 'kmeans', 'ekspor')."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            rerun = _rerun_aktif.get()
+            if rerun is not None:
+                rerun["rentang"][nama] = rerun["rentang"].get(nama, 0.0) + ms
+            logger.debug(json.dumps({"jenis": "rentang", "nama": nama, "ms": ms}))
+
+    # -------------------- QUERY --------------------
+    def catat_query(self, sql, durasi):
+        """Callback untuk Database(trace=...): sql, durasi dalam detik."""
+        ms = durasi * 1000
+        rerun = _rerun_aktif.get()
+        if rerun is not None:
+            rerun["jumlah_query"] += 1
+            rerun["query_ms"] += ms
+        pola = pola_query(sql)
+        with self._lock:
+            stat = self.query.get(pola)
+            if stat is None:
+                if len(self.query) >= MAKS_POLA_QUERY:
+                    # buang pola dengan waktu maksimum terkecil
+                    del self.query[min(self.query, key=lambda k: self.query[k]["maks_ms"])]
+                stat = self.query[pola] = {"jumlah": 0, "total_ms": 0.0, "maks_ms": 0.0, "terakhir": 0.0}
+            stat["jumlah"] += 1
+            stat["total_ms"] += ms
+            stat["maks_ms"] = max(stat["maks_ms"], ms)
+            stat["terakhir"] = time.time()
+        if ms >= AMBANG_LAMBAT_MS:
+            logger.warning(json.dumps({"jenis": "query_lambat", "ms": ms, "sql": pola}))
+
+    # -------------------- LAPORAN --------------------
+    def rerun_terakhir(self):
+        with self._lock:
+            return list(self.rerun)[::-1]
+
+    def query_terlambat(self, n=20):
+        with self._lock:
+            items = [(pola, dict(stat)) for pola, stat in self.query.items()]
+        items.sort(key=lambda x: x[1]["maks_ms"], reverse=True)
+        return items[:n]
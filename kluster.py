@@ -0,0 +1,319 @@
+"""Model K-Means sentimen yang disimpan di database dan diperbarui inkremental.
+
+Model dilatih penuh sekali, lalu tiap rerun hanya responden baru
+(responden_id > terakhir) yang dipakai untuk partial_fit dan diberi label.
+Indeks cluster tidak berubah urutan pada partial_fit, jadi label sentimen
+tetap stabil; latih ulang penuh hanya bila diminta atau terdeteksi drift.
+
+Seleksi model (seleksi_model) membandingkan beberapa k & seed di process pool
+untuk analisis; hasilnya disimpan per versi data dan tidak mengganti model
+sentimen 3 kluster di atas.
+"""
+import io
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+
+from db import muat_skor_responden, versi_data
+
+logger = logging.getLogger("survei.kluster")
+
+N_KLUSTER = 3
+FITUR = ["skor_layanan", "skor_keseluruhan"]
+LABEL_SENTIMEN = ["Negatif/Kurang Puas", "Netral", "Positif/Puas"]
+RASIO_DRIFT = 2.0  # latih ulang bila jarak rata2 data baru > 2x inersia saat latih
+INERSIA_MIN = 0.05  # batas bawah inersia/titik (skor Likert sering menumpuk persis)
+
+
+def _latih_penuh(X):
+    return MiniBatchKMeans(
+        n_clusters=N_KLUSTER, random_state=42, n_init=10, batch_size=1024
+    ).fit(X)
+
+
+def _mapping(model):
+    """cluster -> label sentimen, urut dari rata-rata pusat terendah."""
+    order = np.argsort(model.cluster_centers_.mean(axis=1))
+    return {int(c): LABEL_SENTIMEN[i] for i, c in enumerate(order)}
+
+
+def muat_hasil_kluster(conn):
+    """Skor + cluster tersimpan per responden, untuk dashboard."""
+    df = pd.read_sql_query(
+        """
+        SELECT s.responden_id,
+               CAST(s.total_layanan AS REAL) / s.jumlah_layanan AS skor_layanan,
+               CAST(s.total_keseluruhan AS REAL) / s.jumlah_keseluruhan AS skor_keseluruhan,
+               k.cluster, k.sentimen
+        FROM kluster_responden k
+        JOIN skor_responden s ON s.responden_id = k.responden_id
+        WHERE s.jumlah_layanan > 0 AND s.jumlah_keseluruhan > 0
+        ORDER BY s.responden_id
+        """,
+        conn,
+    )
+    df["sentimen"] = df["sentimen"].astype("category")
+    return df
+
+
+def muat_sel_kluster(conn, presisi=2):
+    """Jumlah responden per sel (skor_layanan, skor_keseluruhan, sentimen).
+
+    Skor adalah rata-rata jawaban Likert 1-5, jadi responden menumpuk di
+    sedikit titik yang sama; jumlah sel tidak ikut tumbuh dengan jumlah responden.
+    """
+    df = pd.read_sql_query(
+        """
+        SELECT ROUND(CAST(s.total_layanan AS REAL) / s.jumlah_layanan, :presisi) AS skor_layanan,
+               ROUND(CAST(s.total_keseluruhan AS REAL) / s.jumlah_keseluruhan, :presisi) AS skor_keseluruhan,
+               k.sentimen,
+               COUNT(*) AS jumlah
+        FROM kluster_responden k
+        JOIN skor_responden s ON s.responden_id = k.responden_id
+        WHERE s.jumlah_layanan > 0 AND s.jumlah_keseluruhan > 0
+        GROUP BY 1, 2, 3
+        ORDER BY 1, 2, 3
+        """,
+        conn,
+        params={"presisi": presisi},
+    )
+    df["sentimen"] = df["sentimen"].astype("category")
+    return df
+
+
+def gabung_hasil_kluster(frames):
+    """Gabungkan muat_hasil_kluster dari beberapa partisi (live + arsip)."""
+    df = pd.concat(frames, ignore_index=True).sort_values("responden_id", ignore_index=True)
+    df["sentimen"] = df["sentimen"].astype("category")
+    return df
+
+
+def gabung_sel_kluster(frames):
+    """Gabungkan muat_sel_kluster dari beberapa partisi: jumlah per sel dijumlahkan."""
+    df = pd.concat(frames, ignore_index=True)
+    df["sentimen"] = df["sentimen"].astype(str)
+    df = df.groupby(["skor_layanan", "skor_keseluruhan", "sentimen"], as_index=False)["jumlah"].sum()
+    df["sentimen"] = df["sentimen"].astype("category")
+    return df
+
+
+class ModelKluster:
+    """Pemegang model per proses; sumber kebenarannya tabel model_kluster."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.model = None
+        self.mapping = None
+        self.responden_terakhir = 0
+        self.inersia_per_titik = None
+        self.versi = 0  # id baris model_kluster yang sedang dipegang
+
+    @property
+    def centers(self):
+        return self.model.cluster_centers_
+
+    def _muat(self, conn):
+        row = conn.execute(
+            "SELECT id, responden_terakhir, inersia_per_titik, versi_sklearn, model "
+            "FROM model_kluster ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        if row is None or row[0] == self.versi:
+            return
+        state = None
+        if row[3] != sklearn.__version__:
+            logger.warning(
+                "model_kluster %s dibuat dengan scikit-learn %s (terpasang %s); dilatih ulang",
+                row[0], row[3], sklearn.__version__,
+            )
+        else:
+            try:
+                state = pickle.loads(row[4])
+            except Exception as e:
+                logger.warning("model_kluster %s tidak bisa dimuat (%s); dilatih ulang", row[0], e)
+        if state is None:
+            # model None -> perbarui() melatih penuh dan menyimpan baris baru
+            self.versi, self.responden_terakhir, self.inersia_per_titik = row[0], 0, None
+            self.model, self.mapping = None, None
+            return
+        self.versi, self.responden_terakhir, self.inersia_per_titik = row[:3]
+        self.model, self.mapping = state["model"], state["mapping"]
+
+    def perbarui(self, db, latih_ulang=False):
+        """Sinkronkan model dengan data terbaru. Return True bila ada perubahan."""
+        with self._lock:
+            db.read(self._muat)
+            penuh = latih_ulang or self.model is None
+            if not penuh:
+                baru = db.read(lambda conn: muat_skor_responden(conn, sejak_id=self.responden_terakhir))
+                if baru.empty:
+                    return False
+                X = baru[FITUR].to_numpy()
+                jarak = (self.model.transform(X).min(axis=1) ** 2).mean()
+                if jarak > RASIO_DRIFT * max(self.inersia_per_titik, INERSIA_MIN):
+                    penuh = True
+                else:
+                    self.model.partial_fit(X)
+                    # urutan pusat bergeser -> label tidak lagi konsisten, latih ulang
+                    penuh = _mapping(self.model) != self.mapping
+            if penuh:
+                baru = db.read(muat_skor_responden)
+                if len(baru) < N_KLUSTER:
+                    return False
+                X = baru[FITUR].to_numpy()
+                self.model = _latih_penuh(X)
+                self.mapping = _mapping(self.model)
+                self.inersia_per_titik = self.model.inertia_ / len(X)
+
+            labels = self.model.predict(X)
+            rows = [
+                (int(rid), int(c), self.mapping[int(c)])
+                for rid, c in zip(baru["responden_id"], labels)
+            ]
+            self.responden_terakhir = int(baru["responden_id"].max())
+            try:
+                self.versi = db.write(lambda conn: self._simpan(conn, rows, penuh))
+            except Exception:
+                # state di memori sudah maju tapi tidak tersimpan: muat ulang nanti
+                self.model, self.versi = None, 0
+                raise
+            return True
+
+    def _simpan(self, conn, rows, penuh):
+        if penuh:
+            conn.execute("DELETE FROM kluster_responden")
+        conn.executemany(
+            "INSERT OR REPLACE INTO kluster_responden (responden_id, cluster, sentimen) VALUES (?, ?, ?)",
+            rows,
+        )
+        blob = pickle.dumps({"model": self.model, "mapping": self.mapping})
+        versi = conn.execute(
+            "INSERT INTO model_kluster (responden_terakhir, inersia_per_titik, versi_sklearn, model) "
+            "VALUES (?, ?, ?, ?)",
+            (self.responden_terakhir, self.inersia_per_titik, sklearn.__version__, blob),
+        ).lastrowid
+        conn.execute("DELETE FROM model_kluster WHERE id < ?", (versi,))
+        return versi
+
+
+# -------------------- SELEKSI MODEL (k & seed) --------------------
+K_KANDIDAT = range(2, 9)
+SEED_KANDIDAT = range(5)
+SAMPEL_SILHOUETTE = 5000  # silhouette O(n^2): dihitung pada sampel acak
+
+_data_pekerja = {}
+
+
+def _siapkan_pekerja(X_unik, bobot, X_sampel):
+    """Initializer process pool: data dikirim sekali per proses, bukan per tugas."""
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(1)  # paralel antar proses, bukan thread BLAS/OpenMP di dalamnya
+    _data_pekerja.update(X_unik=X_unik, bobot=bobot, X_sampel=X_sampel)
+
+
+def _latih_kandidat(X_unik, bobot, k, seed):
+    # skor rata-rata Likert menumpuk di sedikit titik: latih pada titik unik
+    # berbobot jumlah responden (fungsi objektifnya sama dengan data penuh)
+    return KMeans(n_clusters=k, random_state=seed, n_init=1).fit(X_unik, sample_weight=bobot)
+
+
+def _evaluasi(k, seed):
+    X_unik, bobot, X_sampel = _data_pekerja["X_unik"], _data_pekerja["bobot"], _data_pekerja["X_sampel"]
+    model = _latih_kandidat(X_unik, bobot, k, seed)
+    label = model.predict(X_sampel)
+    silhouette = float(silhouette_score(X_sampel, label)) if len(set(label)) > 1 else float("nan")
+    return {
+        "k": k,
+        "seed": seed,
+        "inersia_per_titik": float(model.inertia_ / bobot.sum()),
+        "silhouette": silhouette,
+    }
+
+
+def versi_seleksi(conn):
+    """Versi data yang menjadi kunci cache hasil seleksi."""
+    return json.dumps(versi_data(conn)["jawaban"])
+
+
+def seleksi_model(X, k_kandidat=K_KANDIDAT, seed_kandidat=SEED_KANDIDAT, pekerja=None):
+    """Latih & nilai semua kombinasi (k, seed) secara paralel.
+
+    Return (metrik DataFrame, k terbaik, seed terbaik, model terbaik, sel DataFrame).
+    k terbaik = rata-rata silhouette tertinggi antar seed (seri -> k kecil);
+    seed terbaik = inersia terkecil untuk k tersebut.
+    """
+    X_unik, bobot = np.unique(X, axis=0, return_counts=True)
+    k_kandidat = [k for k in k_kandidat if k < len(X_unik)]
+    if not k_kandidat:
+        raise ValueError("Titik skor unik terlalu sedikit untuk seleksi model.")
+    rng = np.random.default_rng(0)
+    X_sampel = X if len(X) <= SAMPEL_SILHOUETTE else X[rng.choice(len(X), SAMPEL_SILHOUETTE, replace=False)]
+
+    tugas = [(k, seed) for k in k_kandidat for seed in seed_kandidat]
+    pekerja = min(pekerja or os.cpu_count() or 1, len(tugas))
+    # spawn: aman dipanggil dari proses Streamlit yang punya banyak thread
+    with ProcessPoolExecutor(
+        max_workers=pekerja,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_siapkan_pekerja,
+        initargs=(X_unik, bobot, X_sampel),
+    ) as pool:
+        metrik = pd.DataFrame(list(pool.map(_evaluasi, *zip(*tugas))))
+
+    per_k = metrik.groupby("k")["silhouette"].mean()
+    k_terbaik = int(per_k.idxmax()) if per_k.notna().any() else int(metrik["k"].min())
+    kandidat = metrik[metrik["k"] == k_terbaik]
+    seed_terbaik = int(kandidat.loc[kandidat["inersia_per_titik"].idxmin(), "seed"])
+    model = _latih_kandidat(X_unik, bobot, k_terbaik, seed_terbaik)
+    sel = pd.DataFrame(X_unik, columns=FITUR)
+    sel["jumlah"] = bobot
+    sel["cluster"] = model.predict(X_unik)
+    return metrik, k_terbaik, seed_terbaik, model, sel
+
+
+def jalankan_seleksi(db, k_kandidat=K_KANDIDAT, seed_kandidat=SEED_KANDIDAT, pekerja=None):
+    """Seleksi model atas data live saat ini lalu simpan ke seleksi_kluster. Return hasil."""
+    # versi & data dari snapshot yang sama
+    versi, df = db.snapshot(lambda conn: (versi_seleksi(conn), muat_skor_responden(conn)))
+    metrik, k, seed, model, sel = seleksi_model(df[FITUR].to_numpy(dtype=float), k_kandidat, seed_kandidat, pekerja)
+
+    def _simpan(conn):
+        baru = conn.execute(
+            "INSERT INTO seleksi_kluster (versi, k, seed, metrik, sel, model) VALUES (?, ?, ?, ?, ?, ?)",
+            (versi, k, seed, metrik.to_json(orient="records"), sel.to_json(orient="records"),
+             pickle.dumps(model)),
+        ).lastrowid
+        conn.execute("DELETE FROM seleksi_kluster WHERE id < ?", (baru,))
+    db.write(_simpan)
+    return {"versi": versi, "k": k, "seed": seed, "metrik": metrik, "sel": sel, "model": model, "segar": True}
+
+
+def muat_seleksi(conn):
+    """Hasil seleksi terakhir (dict) atau None; `segar` False bila data sudah berubah sejak itu."""
+    row = conn.execute(
+        "SELECT versi, k, seed, metrik, sel, model, dibuat FROM seleksi_kluster ORDER BY id DESC LIMIT 1"
+    ).fetchone()
+    if row is None:
+        return None
+    versi, k, seed, metrik, sel, model, dibuat = row
+    return {
+        "versi": versi,
+        "k": k,
+        "seed": seed,
+        "metrik": pd.read_json(io.StringIO(metrik), orient="records"),
+        "sel": pd.read_json(io.StringIO(sel), orient="records"),
+        "model": pickle.loads(model),
+        "dibuat": dibuat,
+        "segar": versi == versi_seleksi(conn),
+    }
+
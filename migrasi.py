@@ -0,0 +1,564 @@
+"""Migrasi skema database survei, dilacak lewat PRAGMA user_version.
+
+Setiap migrasi dijalankan sekali, dalam transaksinya sendiri, lalu
+user_version dinaikkan. Jangan ubah migrasi yang sudah dirilis; tambahkan
+migrasi baru di akhir MIGRASI.
+"""
+
+
+def _m1_tabel_dasar(conn):
+    """Skema awal (sama dengan setup_database lama)."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS responden (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nama TEXT,
+        jenis_kelamin TEXT,
+        usia TEXT,
+        layanan TEXT,
+        tanggal TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS jawaban (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        responden_id INTEGER,
+        pertanyaan_key TEXT,
+        jawaban_teks TEXT,
+        jawaban_skor INTEGER,
+        FOREIGN KEY (responden_id) REFERENCES responden (id)
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS saran_masukan (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        responden_id INTEGER,
+        saran TEXT,
+        FOREIGN KEY (responden_id) REFERENCES responden (id)
+    )
+    """)
+
+
+# urutan seed = id kecil yang stabil untuk kunci pertanyaan bawaan
+_KUNCI_AWAL = (
+    [f"u{i}" for i in range(1, 11)]
+    + [f"b{i}" for i in range(1, 11)]
+    + ["k1", "k2", "k3"]
+)
+# id label = skornya
+_LABEL_AWAL = [
+    (1, "😠 Sangat Tidak Puas"),
+    (2, "😟 Tidak Puas"),
+    (3, "😐 Netral"),
+    (4, "🙂 Puas"),
+    (5, "😄 Sangat Puas"),
+]
+
+
+def _m2_normalisasi_jawaban(conn):
+    """Kunci pertanyaan & label jawaban -> tabel lookup ber-id integer kecil.
+
+    Data fisik pindah ke jawaban_data; `jawaban` menjadi VIEW dengan kolom
+    yang sama seperti dulu supaya query baca lama tetap berjalan.
+    """
+    conn.execute("""
+    CREATE TABLE pertanyaan (
+        id INTEGER PRIMARY KEY,
+        kunci TEXT NOT NULL UNIQUE
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE label_jawaban (
+        id INTEGER PRIMARY KEY,
+        teks TEXT NOT NULL UNIQUE
+    )
+    """)
+    conn.executemany("INSERT INTO pertanyaan (kunci) VALUES (?)", [(k,) for k in _KUNCI_AWAL])
+    conn.executemany("INSERT INTO label_jawaban (id, teks) VALUES (?, ?)", _LABEL_AWAL)
+    conn.execute("""
+    INSERT OR IGNORE INTO pertanyaan (kunci)
+    SELECT DISTINCT pertanyaan_key FROM jawaban WHERE pertanyaan_key IS NOT NULL
+    """)
+    conn.execute("""
+    INSERT OR IGNORE INTO label_jawaban (teks)
+    SELECT DISTINCT jawaban_teks FROM jawaban WHERE jawaban_teks IS NOT NULL
+    """)
+
+    conn.execute("""
+    CREATE TABLE jawaban_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        responden_id INTEGER,
+        pertanyaan_id INTEGER,
+        label_id INTEGER,
+        jawaban_skor INTEGER,
+        FOREIGN KEY (responden_id) REFERENCES responden (id),
+        FOREIGN KEY (pertanyaan_id) REFERENCES pertanyaan (id),
+        FOREIGN KEY (label_id) REFERENCES label_jawaban (id)
+    )
+    """)
+    conn.execute("""
+    INSERT INTO jawaban_data (id, responden_id, pertanyaan_id, label_id, jawaban_skor)
+    SELECT j.id, j.responden_id, p.id, l.id, j.jawaban_skor
+    FROM jawaban j
+    LEFT JOIN pertanyaan p ON p.kunci = j.pertanyaan_key
+    LEFT JOIN label_jawaban l ON l.teks = j.jawaban_teks
+    """)
+    conn.execute("DROP TABLE jawaban")
+    conn.execute("""
+    CREATE VIEW jawaban AS
+    SELECT d.id, d.responden_id, p.kunci AS pertanyaan_key,
+           l.teks AS jawaban_teks, d.jawaban_skor
+    FROM jawaban_data d
+    LEFT JOIN pertanyaan p ON p.id = d.pertanyaan_id
+    LEFT JOIN label_jawaban l ON l.id = d.label_id
+    """)
+
+
+def _m3_indeks(conn):
+    """Indeks untuk join per responden dan ORDER BY di load_data_from_db."""
+    # ORDER BY responden_id DESC, id ASC -> dibaca langsung dari indeks
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_jawaban_responden ON jawaban_data (responden_id DESC, id)"
+    )
+    # covering untuk agregasi skor per pertanyaan / per responden
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_jawaban_pertanyaan "
+        "ON jawaban_data (pertanyaan_id, responden_id, jawaban_skor)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_saran_responden ON saran_masukan (responden_id DESC, id)"
+    )
+
+
+def _m4_skor_responden(conn):
+    """Ringkasan skor per responden, dijaga trigger pada jawaban_data.
+
+    Disimpan sebagai jumlah & total supaya rata-rata bisa diperbarui per baris;
+    layanan = pertanyaan u.../b..., keseluruhan = pertanyaan k....
+    """
+    conn.execute("""
+    CREATE TABLE skor_responden (
+        responden_id INTEGER PRIMARY KEY,
+        jumlah_layanan INTEGER NOT NULL DEFAULT 0,
+        total_layanan INTEGER NOT NULL DEFAULT 0,
+        jumlah_keseluruhan INTEGER NOT NULL DEFAULT 0,
+        total_keseluruhan INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    conn.execute("""
+    CREATE TRIGGER trg_skor_responden_insert AFTER INSERT ON jawaban_data
+    BEGIN
+        INSERT INTO skor_responden (
+            responden_id, jumlah_layanan, total_layanan, jumlah_keseluruhan, total_keseluruhan
+        )
+        SELECT NEW.responden_id,
+               substr(p.kunci, 1, 1) IN ('u', 'b'),
+               CASE WHEN substr(p.kunci, 1, 1) IN ('u', 'b') THEN NEW.jawaban_skor ELSE 0 END,
+               substr(p.kunci, 1, 1) = 'k',
+               CASE WHEN substr(p.kunci, 1, 1) = 'k' THEN NEW.jawaban_skor ELSE 0 END
+        FROM pertanyaan p
+        WHERE p.id = NEW.pertanyaan_id
+          AND substr(p.kunci, 1, 1) IN ('u', 'b', 'k')
+          AND NEW.jawaban_skor IS NOT NULL
+        ON CONFLICT (responden_id) DO UPDATE SET
+            jumlah_layanan = jumlah_layanan + excluded.jumlah_layanan,
+            total_layanan = total_layanan + excluded.total_layanan,
+            jumlah_keseluruhan = jumlah_keseluruhan + excluded.jumlah_keseluruhan,
+            total_keseluruhan = total_keseluruhan + excluded.total_keseluruhan;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER trg_skor_responden_delete AFTER DELETE ON jawaban_data
+    WHEN OLD.jawaban_skor IS NOT NULL
+    BEGIN
+        UPDATE skor_responden SET
+            jumlah_layanan = jumlah_layanan - (k.grup IN ('u', 'b')),
+            total_layanan = total_layanan - CASE WHEN k.grup IN ('u', 'b') THEN OLD.jawaban_skor ELSE 0 END,
+            jumlah_keseluruhan = jumlah_keseluruhan - (k.grup = 'k'),
+            total_keseluruhan = total_keseluruhan - CASE WHEN k.grup = 'k' THEN OLD.jawaban_skor ELSE 0 END
+        FROM (SELECT substr(kunci, 1, 1) AS grup FROM pertanyaan WHERE id = OLD.pertanyaan_id) AS k
+        WHERE responden_id = OLD.responden_id;
+        DELETE FROM skor_responden
+        WHERE responden_id = OLD.responden_id
+          AND jumlah_layanan = 0 AND jumlah_keseluruhan = 0;
+    END
+    """)
+    # backfill sekali dari data yang sudah ada
+    conn.execute("""
+    INSERT INTO skor_responden (
+        responden_id, jumlah_layanan, total_layanan, jumlah_keseluruhan, total_keseluruhan
+    )
+    SELECT d.responden_id,
+           SUM(substr(p.kunci, 1, 1) IN ('u', 'b')),
+           SUM(CASE WHEN substr(p.kunci, 1, 1) IN ('u', 'b') THEN d.jawaban_skor ELSE 0 END),
+           SUM(substr(p.kunci, 1, 1) = 'k'),
+           SUM(CASE WHEN substr(p.kunci, 1, 1) = 'k' THEN d.jawaban_skor ELSE 0 END)
+    FROM jawaban_data d
+    JOIN pertanyaan p ON p.id = d.pertanyaan_id
+    WHERE substr(p.kunci, 1, 1) IN ('u', 'b', 'k')
+      AND d.jawaban_skor IS NOT NULL
+    GROUP BY d.responden_id
+    """)
+
+
+def _m5_model_kluster(conn):
+    """Model K-Means tersimpan + hasil cluster per responden."""
+    conn.execute("""
+    CREATE TABLE model_kluster (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dibuat TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        responden_terakhir INTEGER NOT NULL,
+        inersia_per_titik REAL,
+        model BLOB NOT NULL
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE kluster_responden (
+        responden_id INTEGER PRIMARY KEY,
+        cluster INTEGER NOT NULL,
+        sentimen TEXT NOT NULL
+    )
+    """)
+
+
+def _m6_tabel_dashboard(conn):
+    """View gabungan responden+saran dan indeks filter tanggal untuk tabel dashboard."""
+    conn.execute("""
+    CREATE VIEW responden_saran AS
+    SELECT r.id, r.nama, r.jenis_kelamin, r.usia, r.layanan, r.tanggal,
+           s.responden_id, s.saran
+    FROM responden r
+    LEFT JOIN saran_masukan s ON s.responden_id = r.id
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_responden_tanggal ON responden (tanggal, id)")
+
+
+def _m7_impor_responden(conn):
+    """Sidik jari baris hasil impor batch, supaya file yang sama tidak masuk dua kali."""
+    conn.execute("""
+    CREATE TABLE impor_responden (
+        sidik TEXT PRIMARY KEY,
+        responden_id INTEGER NOT NULL,
+        berkas TEXT,
+        diimpor TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID
+    """)
+
+
+# rata-rata semua jawaban responden -> kelompok sentimen (sama dengan handler submit)
+_SENTIMEN = """CASE
+        WHEN CAST({r}.total_layanan + {r}.total_keseluruhan AS REAL)
+             / ({r}.jumlah_layanan + {r}.jumlah_keseluruhan) >= 4.0 THEN 'Positif'
+        WHEN CAST({r}.total_layanan + {r}.total_keseluruhan AS REAL)
+             / ({r}.jumlah_layanan + {r}.jumlah_keseluruhan) >= 2.5 THEN 'Netral'
+        ELSE 'Negatif' END"""
+
+
+def _m8_rollup_harian(conn):
+    """Rollup harian untuk tren: skor per (hari, layanan, pertanyaan) & sentimen per hari.
+
+    rollup_harian menyimpan jumlah, total dan total kuadrat skor (rata-rata &
+    simpangan baku bisa dihitung untuk periode apa pun), dijaga trigger pada
+    jawaban_data. rollup_sentimen_harian menghitung responden per kelompok
+    sentimen, dijaga trigger pada skor_responden: tiap kali rata-rata
+    responden berubah, kelompok lamanya dikurangi dan kelompok barunya ditambah.
+    """
+    conn.execute("""
+    CREATE TABLE rollup_harian (
+        hari TEXT NOT NULL,
+        layanan TEXT NOT NULL,
+        pertanyaan_id INTEGER NOT NULL,
+        jumlah INTEGER NOT NULL DEFAULT 0,
+        total INTEGER NOT NULL DEFAULT 0,
+        total_kuadrat INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (hari, layanan, pertanyaan_id)
+    ) WITHOUT ROWID
+    """)
+    conn.execute("""
+    CREATE TABLE rollup_sentimen_harian (
+        hari TEXT NOT NULL,
+        layanan TEXT NOT NULL,
+        sentimen TEXT NOT NULL,
+        jumlah INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (hari, layanan, sentimen)
+    ) WITHOUT ROWID
+    """)
+
+    conn.execute("""
+    CREATE TRIGGER trg_rollup_harian_insert AFTER INSERT ON jawaban_data
+    WHEN NEW.jawaban_skor IS NOT NULL
+    BEGIN
+        INSERT INTO rollup_harian (hari, layanan, pertanyaan_id, jumlah, total, total_kuadrat)
+        SELECT date(r.tanggal), COALESCE(r.layanan, ''), NEW.pertanyaan_id,
+               1, NEW.jawaban_skor, NEW.jawaban_skor * NEW.jawaban_skor
+        FROM responden r WHERE r.id = NEW.responden_id
+        ON CONFLICT (hari, layanan, pertanyaan_id) DO UPDATE SET
+            jumlah = jumlah + 1,
+            total = total + excluded.total,
+            total_kuadrat = total_kuadrat + excluded.total_kuadrat;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER trg_rollup_harian_delete AFTER DELETE ON jawaban_data
+    WHEN OLD.jawaban_skor IS NOT NULL
+    BEGIN
+        UPDATE rollup_harian SET
+            jumlah = jumlah - 1,
+            total = total - OLD.jawaban_skor,
+            total_kuadrat = total_kuadrat - OLD.jawaban_skor * OLD.jawaban_skor
+        FROM (SELECT date(tanggal) AS hari, COALESCE(layanan, '') AS layanan
+              FROM responden WHERE id = OLD.responden_id) AS r
+        WHERE rollup_harian.hari = r.hari
+          AND rollup_harian.layanan = r.layanan
+          AND rollup_harian.pertanyaan_id = OLD.pertanyaan_id;
+    END
+    """)
+
+    tambah = f"""
+        INSERT INTO rollup_sentimen_harian (hari, layanan, sentimen, jumlah)
+        SELECT date(r.tanggal), COALESCE(r.layanan, ''), {_SENTIMEN.format(r="NEW")}, 1
+        FROM responden r WHERE r.id = NEW.responden_id
+        ON CONFLICT (hari, layanan, sentimen) DO UPDATE SET jumlah = jumlah + 1;"""
+    kurang = f"""
+        UPDATE rollup_sentimen_harian SET jumlah = jumlah - 1
+        FROM (SELECT date(tanggal) AS hari, COALESCE(layanan, '') AS layanan
+              FROM responden WHERE id = OLD.responden_id) AS r
+        WHERE rollup_sentimen_harian.hari = r.hari
+          AND rollup_sentimen_harian.layanan = r.layanan
+          AND rollup_sentimen_harian.sentimen = {_SENTIMEN.format(r="OLD")};"""
+    ada = "{r}.jumlah_layanan + {r}.jumlah_keseluruhan > 0"
+    berubah = f"{_SENTIMEN.format(r='OLD')} IS NOT {_SENTIMEN.format(r='NEW')}"
+    conn.execute(f"""
+    CREATE TRIGGER trg_rollup_sentimen_insert AFTER INSERT ON skor_responden
+    WHEN {ada.format(r="NEW")}
+    BEGIN{tambah}
+    END
+    """)
+    # update hanya menyentuh rollup bila kelompok sentimennya berpindah:
+    # kurangi kelompok lama, tambah kelompok baru
+    conn.execute(f"""
+    CREATE TRIGGER trg_rollup_sentimen_update_lama AFTER UPDATE ON skor_responden
+    WHEN {ada.format(r="OLD")} AND (NOT ({ada.format(r="NEW")}) OR {berubah})
+    BEGIN{kurang}
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER trg_rollup_sentimen_update_baru AFTER UPDATE ON skor_responden
+    WHEN {ada.format(r="NEW")} AND (NOT ({ada.format(r="OLD")}) OR {berubah})
+    BEGIN{tambah}
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER trg_rollup_sentimen_delete AFTER DELETE ON skor_responden
+    WHEN {ada.format(r="OLD")}
+    BEGIN{kurang}
+    END
+    """)
+
+    # backfill sekali dari data yang sudah ada
+    conn.execute("""
+    INSERT INTO rollup_harian (hari, layanan, pertanyaan_id, jumlah, total, total_kuadrat)
+    SELECT date(r.tanggal), COALESCE(r.layanan, ''), d.pertanyaan_id,
+           COUNT(*), SUM(d.jawaban_skor), SUM(d.jawaban_skor * d.jawaban_skor)
+    FROM jawaban_data d
+    JOIN responden r ON r.id = d.responden_id
+    WHERE d.jawaban_skor IS NOT NULL AND d.pertanyaan_id IS NOT NULL
+    GROUP BY 1, 2, 3
+    """)
+    conn.execute(f"""
+    INSERT INTO rollup_sentimen_harian (hari, layanan, sentimen, jumlah)
+    SELECT date(r.tanggal), COALESCE(r.layanan, ''), {_SENTIMEN.format(r="s")}, COUNT(*)
+    FROM skor_responden s
+    JOIN responden r ON r.id = s.responden_id
+    WHERE {ada.format(r="s")}
+    GROUP BY 1, 2, 3
+    """)
+
+
+def _m9_arsip_bulan(conn):
+    """Daftar bulan yang sudah dipindah ke berkas arsip (lihat arsip.py)."""
+    conn.execute("""
+    CREATE TABLE arsip_bulan (
+        bulan TEXT PRIMARY KEY,
+        berkas TEXT NOT NULL,
+        jumlah_responden INTEGER NOT NULL,
+        id_min INTEGER,
+        id_max INTEGER,
+        diarsipkan TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def _m10_saran_fts(conn):
+    """Indeks FTS5 (external content) atas saran_masukan.saran, dijaga trigger."""
+    conn.execute("""
+    CREATE VIRTUAL TABLE saran_fts USING fts5(
+        saran,
+        content = 'saran_masukan',
+        content_rowid = 'id',
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """)
+    conn.execute("""
+    CREATE TRIGGER trg_saran_fts_insert AFTER INSERT ON saran_masukan
+    BEGIN
+        INSERT INTO saran_fts (rowid, saran) VALUES (NEW.id, NEW.saran);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER trg_saran_fts_delete AFTER DELETE ON saran_masukan
+    BEGIN
+        INSERT INTO saran_fts (saran_fts, rowid, saran) VALUES ('delete', OLD.id, OLD.saran);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER trg_saran_fts_update AFTER UPDATE OF saran ON saran_masukan
+    BEGIN
+        INSERT INTO saran_fts (saran_fts, rowid, saran) VALUES ('delete', OLD.id, OLD.saran);
+        INSERT INTO saran_fts (rowid, saran) VALUES (NEW.id, NEW.saran);
+    END
+    """)
+    # backfill sekali dari data yang sudah ada
+    conn.execute("INSERT INTO saran_fts (saran_fts) VALUES ('rebuild')")
+
+
+def _m11_seleksi_kluster(conn):
+    """Hasil seleksi otomatis k & seed K-Means, dikunci per versi data."""
+    conn.execute("""
+    CREATE TABLE seleksi_kluster (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dibuat TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        versi TEXT NOT NULL,
+        k INTEGER NOT NULL,
+        seed INTEGER NOT NULL,
+        metrik TEXT NOT NULL,
+        sel TEXT NOT NULL,
+        model BLOB NOT NULL
+    )
+    """)
+
+
+def _m12_rollup_skor_harian(conn):
+    """Jumlah jawaban per (hari, layanan, pertanyaan, skor) untuk uji bootstrap Umum vs BPJS.
+
+    Skor Likert hanya 1-5, jadi distribusi lengkap per pertanyaan cukup lima
+    angka; dijaga trigger pada jawaban_data seperti rollup_harian.
+    """
+    conn.execute("""
+    CREATE TABLE rollup_skor_harian (
+        hari TEXT NOT NULL,
+        layanan TEXT NOT NULL,
+        pertanyaan_id INTEGER NOT NULL,
+        skor INTEGER NOT NULL,
+        jumlah INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (hari, layanan, pertanyaan_id, skor)
+    ) WITHOUT ROWID
+    """)
+    conn.execute("""
+    CREATE TRIGGER trg_rollup_skor_insert AFTER INSERT ON jawaban_data
+    WHEN NEW.jawaban_skor IS NOT NULL
+    BEGIN
+        INSERT INTO rollup_skor_harian (hari, layanan, pertanyaan_id, skor, jumlah)
+        SELECT date(r.tanggal), COALESCE(r.layanan, ''), NEW.pertanyaan_id, NEW.jawaban_skor, 1
+        FROM responden r WHERE r.id = NEW.responden_id
+        ON CONFLICT (hari, layanan, pertanyaan_id, skor) DO UPDATE SET jumlah = jumlah + 1;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER trg_rollup_skor_delete AFTER DELETE ON jawaban_data
+    WHEN OLD.jawaban_skor IS NOT NULL
+    BEGIN
+        UPDATE rollup_skor_harian SET jumlah = jumlah - 1
+        FROM (SELECT date(tanggal) AS hari, COALESCE(layanan, '') AS layanan
+              FROM responden WHERE id = OLD.responden_id) AS r
+        WHERE rollup_skor_harian.hari = r.hari
+          AND rollup_skor_harian.layanan = r.layanan
+          AND rollup_skor_harian.pertanyaan_id = OLD.pertanyaan_id
+          AND rollup_skor_harian.skor = OLD.jawaban_skor;
+    END
+    """)
+    # backfill sekali dari data yang sudah ada
+    conn.execute("""
+    INSERT INTO rollup_skor_harian (hari, layanan, pertanyaan_id, skor, jumlah)
+    SELECT date(r.tanggal), COALESCE(r.layanan, ''), d.pertanyaan_id, d.jawaban_skor, COUNT(*)
+    FROM jawaban_data d
+    JOIN responden r ON r.id = d.responden_id
+    WHERE d.jawaban_skor IS NOT NULL AND d.pertanyaan_id IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+    """)
+
+
+def _m13_hapus_rollup_harian(conn):
+    """Tren skor kini dihitung dari rollup_skor_harian; rollup_harian (m8) tidak dipakai lagi.
+
+    rollup_skor_harian sudah memuat jumlah per skor, jadi total dan total
+    kuadrat bisa diturunkan darinya; trigger lama hanya menambah kerja tiap
+    insert jawaban_data.
+    """
+    conn.execute("DROP TRIGGER trg_rollup_harian_insert")
+    conn.execute("DROP TRIGGER trg_rollup_harian_delete")
+    conn.execute("DROP TABLE rollup_harian")
+
+
+def _m14_identitas_db(conn):
+    """Id acak per database, dibuat sekali saat migrasi.
+
+    Database yang dibuat ulang (atau database lain) bisa punya rentang id yang
+    sama; id ini membedakannya di kunci cache ekspor.
+    """
+    conn.execute("""
+    CREATE TABLE identitas_db (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        uuid TEXT NOT NULL
+    )
+    """)
+    conn.execute("INSERT INTO identitas_db (id, uuid) VALUES (1, lower(hex(randomblob(16))))")
+
+
+def _m15_versi_sklearn_model(conn):
+    """Versi scikit-learn yang membuat pickle model_kluster (model lama: NULL, dilatih ulang)."""
+    conn.execute("ALTER TABLE model_kluster ADD COLUMN versi_sklearn TEXT")
+
+
+# (versi, fungsi, perlu VACUUM sesudahnya)
+MIGRASI = [
+    (1, _m1_tabel_dasar, False),
+    (2, _m2_normalisasi_jawaban, True),
+    (3, _m3_indeks, False),
+    (4, _m4_skor_responden, False),
+    (5, _m5_model_kluster, False),
+    (6, _m6_tabel_dashboard, False),
+    (7, _m7_impor_responden, False),
+    (8, _m8_rollup_harian, False),
+    (9, _m9_arsip_bulan, False),
+    (10, _m10_saran_fts, False),
+    (11, _m11_seleksi_kluster, False),
+    (12, _m12_rollup_skor_harian, False),
+    (13, _m13_hapus_rollup_harian, False),
+    (14, _m14_identitas_db, False),
+    (15, _m15_versi_sklearn_model, False),
+]
+
+
+def versi_skema(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def jalankan_migrasi(db):
+    """Terapkan semua migrasi yang belum jalan. Return versi skema akhir."""
+    def _satu(conn, versi, fn):
+        # dicek ulang di dalam transaksi: proses lain mungkin sudah menjalankannya
+        if versi_skema(conn) >= versi:
+            return False
+        fn(conn)
+        conn.execute(f"PRAGMA user_version = {versi}")
+        return True
+
+    perlu_vacuum = False
+    for versi, fn, vacuum in MIGRASI:
+        if db.write(lambda conn: _satu(conn, versi, fn)) and vacuum:
+            perlu_vacuum = True
+    if perlu_vacuum:
+        db.vacuum()
+    return db.read(versi_skema)